@@ -695,6 +695,6 @@ pygame.display.update()
 # filepath = os.path.join('images',filename+'.png')
 # pygame.image.save(screen, filepath)
 
-raw_input("<Press ENTER to exit>")
+input("<Press ENTER to exit>")
 
 
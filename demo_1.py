@@ -63,11 +63,13 @@
 # As I later find out, it's not the color that make seed robot hard to distinguish, it's because
 # the size of the dot is small.
 
+# Dependencies: pygame, numpy, and scipy for the pairwise robot distances (pdist).
+
 
-from __future__ import print_function
 import pygame
-import sys, os, getopt, math, random
+import sys, os, getopt, math
 import numpy as np
+from scipy.spatial.distance import pdist, squareform
 import pickle  # for storing variables
 
 swarm_size = 30  # default size of the swarm
@@ -115,6 +117,7 @@ screen_size = (screen_side_length, screen_side_length)  # square display world
 
 # formation configuration
 comm_range = 0.65  # communication range in the world
+comm_range_sq = comm_range * comm_range  # for comparing with squared distances
 desired_space_ratio = 0.8  # ratio of the desired space to the communication range
     # should be larger than 1/1.414=0.71, to avoid connections crossing each other
 desired_space = comm_range * desired_space_ratio
@@ -130,42 +133,51 @@ shape_decision = -1  # the index of chosen decision, in range(shape_quantity)
     # also the index in shape_catalog
 assignment_scheme = np.zeros(swarm_size)
 # variable to force shape to different choices, for video recording
-force_shape_set = range(shape_quantity)
+force_shape_set = list(range(shape_quantity))
+
+# random number generator for all the random quantities in the simulations
+rng = np.random.default_rng()
 
 # robot properties
-robot_poses = np.random.rand(swarm_size, 2) * world_side_length  # initialize the robot poses
+robot_poses = rng.random((swarm_size, 2)) * world_side_length  # initialize the robot poses
 dist_table = np.zeros((swarm_size, swarm_size))  # distances between robots
 conn_table = np.zeros((swarm_size, swarm_size))  # connections between robots
     # 0 for disconnected, 1 for connected
 conn_lists = [[] for i in range(swarm_size)]  # lists of robots connected
+# robot pair of each entry in the condensed pdist output, fixed for the swarm size
+tri_i, tri_j = np.triu_indices(swarm_size, 1)
 # function for all simulations, update the distances and connections between the robots
 def dist_conn_update():
     global dist_table
     global conn_table
     global conn_lists
-    conn_lists = [[] for i in range(swarm_size)]  # empty the lists
-    for i in range(swarm_size):
-        for j in range(i+1, swarm_size):
-            dist_temp = np.linalg.norm(robot_poses[i] - robot_poses[j])
-            dist_table[i,j] = dist_temp
-            dist_table[j,i] = dist_temp
-            if dist_temp > comm_range:
-                conn_table[i,j] = 0
-                conn_table[j,i] = 0
-            else:
-                conn_table[i,j] = 1
-                conn_table[j,i] = 1
-                conn_lists[i].append(j)
-                conn_lists[j].append(i)
+    # squared distances of the upper triangle pairs, checked against the range in one pass
+    dist_sq = pdist(robot_poses, 'sqeuclidean')
+    conn_mask = dist_sq <= comm_range_sq
+    conn_i = tri_i[conn_mask]
+    conn_j = tri_j[conn_mask]
+    conn_table = np.zeros((swarm_size, swarm_size))
+    conn_table[conn_i, conn_j] = 1
+    conn_table[conn_j, conn_i] = 1
+    dist_table = squareform(np.sqrt(dist_sq))
+    # CSR adjacency from both directions of the connected pairs, grouped by robot
+    # (the lower side neighbors go first, so that each robot's list stays ascending)
+    conn_degrees = (np.bincount(conn_i, minlength=swarm_size) +
+        np.bincount(conn_j, minlength=swarm_size))
+    conn_indptr = np.concatenate(([0], np.cumsum(conn_degrees))).tolist()
+    conn_rows = np.concatenate((conn_j, conn_i))
+    conn_cols = np.concatenate((conn_i, conn_j))[np.argsort(conn_rows, kind='stable')].tolist()
+    conn_lists = [conn_cols[conn_indptr[i]:conn_indptr[i+1]] for i in range(swarm_size)]
 dist_conn_update()  # update the distances and connections
-disp_poses = []  # display positions
-# function for all simulations, update the display positions
+disp_poses = np.zeros((swarm_size, 2), dtype=int)  # display positions
+disp_poses_buf = np.zeros((swarm_size, 2))  # reused buffer for the conversion
+disp_scale = screen_side_length / world_side_length  # world length to screen pixels
+# function for all simulations, update the display positions in place
 def disp_poses_update():
-    global disp_poses
-    poses_temp = robot_poses / world_side_length
-    poses_temp[:,1] = 1.0 - poses_temp[:,1]
-    poses_temp = poses_temp * screen_side_length
-    disp_poses = poses_temp.astype(int)  # convert to int and assign to disp_poses
+    # one affine map per axis, y axis is flipped by subtracting from the screen side
+    np.multiply(robot_poses, disp_scale, out=disp_poses_buf)
+    np.subtract(screen_side_length, disp_poses_buf[:,1], out=disp_poses_buf[:,1])
+    disp_poses[:] = disp_poses_buf  # truncated to int, same as astype(int)
 disp_poses_update()
 # deciding the seed robots, used in simulations with moving robots
 seed_percentage = 0.1  # the percentage of seed robots in the swarm
@@ -174,7 +186,7 @@ seed_quantity = min(max(int(swarm_size*seed_percentage), 1), swarm_size)
 robot_seeds = [False for i in range(swarm_size)]  # whether a robot is a seed robot
     # only seed robot can initialize the forming a new group
 seed_list_temp = np.arange(swarm_size)
-np.random.shuffle(seed_list_temp)
+rng.shuffle(seed_list_temp)
 for i in seed_list_temp[:seed_quantity]:
     robot_seeds[i] = True
 
@@ -205,18 +217,32 @@ robot_ring_size = 9  # extra ring on robot in consensus simulations
 
 # set up the simulation window
 pygame.init()
+# only the close button and key releases are handled, keep other events out of the queue
+pygame.event.set_blocked(None)
+pygame.event.set_allowed([pygame.QUIT, pygame.KEYUP])
 font = pygame.font.SysFont("Cabin", 12)
 icon = pygame.image.load("icon_geometry_art.jpg")
 pygame.display.set_icon(icon)
 screen = pygame.display.set_mode(screen_size)
 pygame.display.set_caption("Demo 1")
+# pre-rendered robot sprites, so that many robots can be drawn by one screen.blits() call
+def robot_sprite(color, radius, width):
+    sprite = pygame.Surface((2*radius+1, 2*radius+1), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, color, (radius, radius), radius, width)
+    return sprite
+# sprites for the single robots in formation simulations, key is (being seed, state)
+single_sprites = {(True, -1): robot_sprite(color_red, robot_size_formation, robot_width_empty),
+    (True, 0): robot_sprite(color_red, robot_size_formation, 0),
+    (False, -1): robot_sprite(color_grey, robot_size_formation, robot_width_empty),
+    (False, 0): robot_sprite(color_grey, robot_size_formation, 0)}
 # draw the network
 screen.fill(color_white)
-for i in range(swarm_size):
-    pygame.draw.circle(screen, color_black, disp_poses[i], robot_size_formation,
-        robot_width_empty)
-    # pygame.draw.circle(screen, color_black, disp_poses[i],
-    #     int(comm_range*pixels_per_length), 1)
+sprite_temp = robot_sprite(color_black, robot_size_formation, robot_width_empty)
+screen.blits([(sprite_temp, disp_poses[i]-robot_size_formation)
+    for i in range(swarm_size)], False)
+# for i in range(swarm_size):
+#     pygame.draw.circle(screen, color_black, disp_poses[i],
+#         int(comm_range*pixels_per_length), 1)
 pygame.display.update()
 
 # pause to check the network before the simulations, or for screen recording
@@ -359,8 +385,8 @@ while True:
         # '1' for in a group, adjust position for maintaining connections
     n1_life_lower = 2  # inclusive
     n1_life_upper = 6  # exclusive
-    robot_n1_lives = np.random.uniform(n1_life_lower, n1_life_upper, swarm_size)
-    robot_oris = np.random.rand(swarm_size) * 2 * math.pi - math.pi  # in range of [-pi, pi)
+    robot_n1_lives = rng.uniform(n1_life_lower, n1_life_upper, swarm_size)
+    robot_oris = rng.uniform(-math.pi, math.pi, swarm_size)  # in range of [-pi, pi)
 
     # group properties
     groups = {}
@@ -381,8 +407,7 @@ while True:
 
     # the loop for simulation 1
     sim_haulted = False
-    time_last = pygame.time.get_ticks()
-    time_now = time_last
+    sim_clock = pygame.time.Clock()  # sleeps out the rest of each frame
     frame_period = 50
     sim_freq_control = True
     iter_count = 0
@@ -400,6 +425,11 @@ while True:
     # sys.stdout.write("[" + prog_pos*"-" + "#" + (prog_bar_len-(prog_pos+1))*"-" + "]\r")
     # sys.stdout.flush()
     while True:
+        # simulation frequency control, ahead of the pause check so that a
+        # paused simulation also sleeps out each frame
+        if sim_freq_control or sim_haulted:
+            sim_clock.tick(1000.0/frame_period)
+
         # close window button to exit the entire program;
         # space key to pause this simulation
         for event in pygame.event.get():
@@ -411,14 +441,6 @@ while True:
                     sim_haulted = not sim_haulted  # reverse the pause flag
         if sim_haulted: continue
 
-        # simulation frequency control
-        if sim_freq_control:
-            time_now = pygame.time.get_ticks()
-            if (time_now - time_last) > frame_period:
-                time_last = time_now
-            else:
-                continue
-
         # increase iteration count
         iter_count = iter_count + 1
         # sys.stdout.write("\riteration {}".format(iter_count))
@@ -453,10 +475,8 @@ while True:
                 if robot_n1_lives[i] < 0:
                     st_n1to0.append(i)  # life of '-1' ends, becoming '0'
                 else:
-                    conn_temp  = conn_lists[i][:]  # a list of connections with only state '1'
-                    for j in conn_lists[i]:
-                        if robot_states[j] != 1:
-                            conn_temp.remove(j)
+                    # a list of connections with only state '1'
+                    conn_temp = [j for j in conn_lists[i] if robot_states[j] == 1]
                     if len(conn_temp) != 0:
                         groups_local, group_id_max = S14_robot_grouping(conn_temp,
                             robot_group_ids, groups)
@@ -493,15 +513,11 @@ while True:
                     # find the closest robot, schedule to start a new group with it
                     st_0to1_new[i] = S14_closest_robot(i, state0_list)
             elif robot_states[i] == 1:  # for host robot with state '1'
-                conn_temp  = conn_lists[i][:]  # a list of connections with only state '1'
-                has_other_group = False  # whether there is robot '1' from other group
+                # a list of connections with only state '1'
+                conn_temp = [j for j in conn_lists[i] if robot_states[j] == 1]
                 host_group_id = robot_group_ids[i]  # group id of host robot
-                for j in conn_lists[i]:
-                    if robot_states[j] != 1:
-                        conn_temp.remove(j)
-                    else:
-                        if robot_group_ids[j] != host_group_id:
-                            has_other_group = True
+                # whether there is robot '1' from other group
+                has_other_group = any(robot_group_ids[j] != host_group_id for j in conn_temp)
                 # disassemble the smaller groups
                 if has_other_group:
                     groups_local, group_id_max = S14_robot_grouping(conn_temp,
@@ -534,9 +550,9 @@ while True:
         for group_id_temp in st_gton1:
             for robot_temp in groups[group_id_temp][0]:
                 robot_states[robot_temp] = -1
-                robot_n1_lives[robot_temp] = np.random.uniform(n1_life_lower, n1_life_upper)
+                robot_n1_lives[robot_temp] = rng.uniform(n1_life_lower, n1_life_upper)
                 robot_group_ids[robot_temp] = -1
-                robot_oris[robot_temp] = np.random.rand() * 2 * math.pi - math.pi
+                robot_oris[robot_temp] = rng.uniform(-math.pi, math.pi)
             groups.pop(group_id_temp)
         # 3.st_0to1_new
         while len(st_0to1_new.keys()) != 0:
@@ -548,9 +564,9 @@ while True:
                 # only forming a group if there is at least one seed robot in the pair
                 if robot_seeds[pair0] or robot_seeds[pair1]:
                     # forming new group for robot pair0 and pair1
-                    group_id_temp = np.random.randint(0, group_id_upper)
+                    group_id_temp = rng.integers(0, group_id_upper)
                     while group_id_temp in groups.keys():
-                        group_id_temp = np.random.randint(0, group_id_upper)
+                        group_id_temp = rng.integers(0, group_id_upper)
                     # update properties of the robots
                     robot_states[pair0] = 1
                     robot_states[pair1] = 1
@@ -582,7 +598,7 @@ while True:
                     if (robot_states[j] == 1) and (robot_group_ids[j] == host_group_id):
                         local_conn_lists[i].append(j)
                 if len(local_conn_lists[i]) == 0:  # should not happen after parameter tuning
-                    printf("robot {} loses its group {}".format(i, host_group_id))
+                    print("robot {} loses its group {}".format(i, host_group_id))
                     sys.exit()
                 # calculating the moving direction, based on neighbor situation
                 if (len(local_conn_lists[i]) == 1) and (len(groups[host_group_id][0]) > 2):
@@ -627,18 +643,10 @@ while True:
         # update the graphics
         disp_poses_update()
         screen.fill(color_white)
-        # draw the robots of states '-1' and '0'
-        for i in range(swarm_size):
-            if robot_seeds[i]:
-                color_temp = color_red
-            else:
-                color_temp = color_grey
-            if robot_states[i] == -1:  # empty circle for state '-1' robot
-                pygame.draw.circle(screen, color_temp, disp_poses[i],
-                    robot_size_formation, robot_width_empty)
-            elif robot_states[i] == 0:  # full circle for state '0' robot
-                pygame.draw.circle(screen, color_temp, disp_poses[i],
-                    robot_size_formation, 0)
+        # draw the robots of states '-1' and '0', empty circle for '-1', full for '0'
+        screen.blits([(single_sprites[robot_seeds[i], robot_states[i]],
+            disp_poses[i]-robot_size_formation) for i in range(swarm_size)
+            if robot_states[i] in (-1, 0)], False)
         # draw the in-group robots by each group
         for group_id_temp in groups.keys():
             if groups[group_id_temp][2]:
@@ -709,15 +717,15 @@ while True:
     screen.fill(color_white)
     for i in range(swarm_size):
         pygame.draw.circle(screen, color_black, disp_poses[i], robot_size_consensus, 0)
-        for j in range(i+1, swarm_size):
-            if conn_table[i,j]:
+        for j in conn_lists[i]:
+            if j > i:  # each connection drawn once
                 pygame.draw.line(screen, color_black, disp_poses[i], disp_poses[j],
                     conn_width_thin_consensus)
     pygame.display.update()
 
     # initialize the decision making variables
     shape_decision = -1
-    deci_dist = np.random.rand(swarm_size, shape_quantity)
+    deci_dist = rng.random((swarm_size, shape_quantity))
     sum_temp = np.sum(deci_dist, axis=1)
     for i in range(swarm_size):
         deci_dist[i] = deci_dist[i] / sum_temp[i]
@@ -737,13 +745,18 @@ while True:
 
     # the loop for simulation 2
     sim_haulted = False
-    time_last = pygame.time.get_ticks()
-    time_now = time_last
+    sim_clock = pygame.time.Clock()  # sleeps out the rest of each frame
     frame_period = 1000
     sim_freq_control = True
+    event_period = 50  # frame for handling the events, in ms
+    time_last = pygame.time.get_ticks() - frame_period  # first iteration runs at once
     iter_count = 0
     sys.stdout.write("iteration {}".format(iter_count))
     while True:
+        # short frames for handling the events, also while paused
+        if sim_freq_control or sim_haulted:
+            sim_clock.tick(1000.0/event_period)
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:  # close window button is clicked
                 print("program exit in simulation 2")
@@ -753,13 +766,11 @@ while True:
                     sim_haulted = not sim_haulted  # reverse the pause flag
         if sim_haulted: continue
 
-        # simulation frequency control
+        # simulation frequency control, run one iteration once the period has passed
         if sim_freq_control:
             time_now = pygame.time.get_ticks()
-            if (time_now - time_last) > frame_period:
-                time_last = time_now
-            else:
-                continue
+            if time_now - time_last < frame_period: continue
+            time_last = time_now
 
         # increase iteration count
         iter_count = iter_count + 1
@@ -772,7 +783,7 @@ while True:
         # 2.update the groups
         groups = []  # empty the group container
         group_deci = []  # the exhibited decision of the groups
-        robot_pool = range(swarm_size)  # a robot pool, to be assigned into groups
+        robot_pool = list(range(swarm_size))  # a robot pool, to be assigned into groups
         while len(robot_pool) != 0:  # searching groups one by one from the global robot pool
             # start a new group, with first robot in the robot_pool
             first_member = robot_pool[0]  # first member of this group
@@ -812,12 +823,12 @@ while True:
         # update the colors for the exhibited decisions
         if not color_initialized:
             color_initialized = True
-            select_set = range(color_quantity)  # the initial selecting set
+            select_set = list(range(color_quantity))  # the initial selecting set
             all_deci_set = set(group_deci)  # put all exhibited decisions in a set
             for deci in all_deci_set:  # avoid checking duplicate decisions
                 if len(select_set) == 0:
-                    select_set = range(color_quantity)  # start a new set to select from
-                chosen_color = np.random.choice(select_set)
+                    select_set = list(range(color_quantity))  # start a new set to select from
+                chosen_color = rng.choice(select_set)
                 select_set.remove(chosen_color)
                 deci_colors[deci] = chosen_color  # assign the chosen color to decision
                 # increase the assignments of chosen color by 1
@@ -839,11 +850,11 @@ while True:
                         # construct a new select_set
                         color_assigns_min = min(color_assigns)
                         color_assigns_temp = [j - color_assigns_min for j in color_assigns]
-                        select_set = range(color_quantity)
+                        select_set = list(range(color_quantity))
                         for j in range(color_quantity):
                             if color_assigns_temp[j] != 0:
                                 select_set.remove(j)
-                    chosen_color = np.random.choice(select_set)
+                    chosen_color = rng.choice(select_set)
                     select_set.remove(chosen_color)
                     deci_colors[group_deci[i]] = chosen_color  # assign the chosen color
                     # increase the assignments of chosen color by 1
@@ -909,7 +920,7 @@ while True:
                     large_end = 2.0/shape_quantity - small_end
                     # sort the magnitude of the current distribution
                     dist_temp = np.copy(deci_dist[i])  # temporary distribution
-                    sort_index = range(shape_quantity)
+                    sort_index = list(range(shape_quantity))
                     for j in range(shape_quantity-1):  # bubble sort, ascending order
                         for k in range(shape_quantity-1-j):
                             if dist_temp[k] > dist_temp[k+1]:
@@ -946,8 +957,8 @@ while True:
         screen.fill(color_white)
         # draw the regualr connecting lines
         for i in range(swarm_size):
-            for j in range(i+1, swarm_size):
-                if conn_table[i,j]:
+            for j in conn_lists[i]:
+                if j > i:  # each connection drawn once
                     pygame.draw.line(screen, color_black, disp_poses[i], disp_poses[j],
                         conn_width_thin_consensus)
         # draw the connecting lines marking the groups
@@ -988,8 +999,8 @@ while True:
     screen.fill(color_white)
     for i in range(swarm_size):
         pygame.draw.circle(screen, color_black, disp_poses[i], robot_size_consensus, 0)
-        for j in range(i+1, swarm_size):
-            if conn_table[i,j]:
+        for j in conn_lists[i]:
+            if j > i:  # each connection drawn once
                 pygame.draw.line(screen, color_black, disp_poses[i], disp_poses[j],
                     conn_width_thin_consensus)
     pygame.display.update()
@@ -1037,7 +1048,7 @@ while True:
 
     # initialize the role assignment variables
     # preference distribution of all robots
-    pref_dist = np.random.rand(swarm_size, swarm_size)  # no need to normalize it
+    pref_dist = rng.random((swarm_size, swarm_size))  # no need to normalize it
     initial_roles = np.argmax(pref_dist, axis=1)  # the chosen role
     # the local assignment information
     local_role_assignment = [[[-1, 0, -1] for j in range(swarm_size)] for i in range(swarm_size)]
@@ -1072,17 +1083,17 @@ while True:
     role_color = [0 for i in range(swarm_size)]  # colors for a conflicting role
     # Dynamically manage color for conflicting robots is unnecessarily complicated, might just
     # assign the colors in advance.
-    role_index_pool = range(swarm_size)
-    random.shuffle(role_index_pool)
-    color_index_pool = range(color_quantity)
-    random.shuffle(color_index_pool)
+    role_index_pool = list(range(swarm_size))
+    rng.shuffle(role_index_pool)
+    color_index_pool = list(range(color_quantity))
+    rng.shuffle(color_index_pool)
     while len(role_index_pool) != 0:
         role_color[role_index_pool[0]] = color_index_pool[0]
         role_index_pool.pop(0)
         color_index_pool.pop(0)
         if len(color_index_pool) == 0:
-            color_index_pool = range(color_quantity)
-            random.shuffle(color_index_pool)
+            color_index_pool = list(range(color_quantity))
+            rng.shuffle(color_index_pool)
 
     # flags
     transmit_flag = [[False for j in range(swarm_size)] for i in range(swarm_size)]
@@ -1093,13 +1104,18 @@ while True:
 
     # the loop for simulation 3
     sim_haulted = False
-    time_last = pygame.time.get_ticks()
-    time_now = time_last
+    sim_clock = pygame.time.Clock()  # sleeps out the rest of each frame
     time_period = 2000  # not frame_period
     sim_freq_control = True
+    event_period = 50  # frame for handling the events, in ms
+    time_last = pygame.time.get_ticks() - time_period  # first iteration runs at once
     flash_delay = 200
     sys.stdout.write("iteration {}".format(iter_count))
     while True:
+        # short frames for handling the events, also while paused
+        if sim_freq_control or sim_haulted:
+            sim_clock.tick(1000.0/event_period)
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:  # close window button is clicked
                 print("program exit in simulation 3")
@@ -1109,13 +1125,11 @@ while True:
                     sim_haulted = not sim_haulted  # reverse the pause flag
         if sim_haulted: continue
 
-        # simulation frequency control
+        # simulation frequency control, run one iteration once the period has passed
         if sim_freq_control:
             time_now = pygame.time.get_ticks()
-            if (time_now - time_last) > time_period:
-                time_last = time_now
-            else:
-                continue
+            if time_now - time_last < time_period: continue
+            time_last = time_now
 
         # increase iteration count
         iter_count = iter_count + 1
@@ -1214,8 +1228,8 @@ while True:
 
         # update the display
         for i in range(swarm_size):
-            for j in range(i+1, swarm_size):
-                if conn_table[i,j]:
+            for j in conn_lists[i]:
+                if j > i:  # each connection drawn once
                     pygame.draw.line(screen, color_black, disp_poses[i], disp_poses[j],
                         conn_width_thin_consensus)
         for i in range(swarm_size):
@@ -1286,8 +1300,8 @@ while True:
         # '2' for in a group, order on loop satisfied
     n1_life_lower = 2  # inclusive
     n1_life_upper = 6  # exclusive
-    robot_n1_lives = np.random.uniform(n1_life_lower, n1_life_upper, swarm_size)
-    robot_oris = np.random.rand(swarm_size) * 2 * math.pi - math.pi  # in range of [-pi, pi)
+    robot_n1_lives = rng.uniform(n1_life_lower, n1_life_upper, swarm_size)
+    robot_oris = rng.uniform(-math.pi, math.pi, swarm_size)  # in range of [-pi, pi)
     robot_key_neighbors = [[] for i in range(swarm_size)]  # key neighbors for robot on loop
         # for state '1' robot: the robot that it is climbing around
         # for state '2' robot: the left and right neighbors in serial connection on the loop
@@ -1318,8 +1332,7 @@ while True:
 
     # the loop for simulation 4
     sim_haulted = False
-    time_last = pygame.time.get_ticks()
-    time_now = time_last
+    sim_clock = pygame.time.Clock()  # sleeps out the rest of each frame
     frame_period = 50
     sim_freq_control = True
     iter_count = 0
@@ -1328,6 +1341,11 @@ while True:
     loop_formed = False
     ending_period = 1.0  # grace period
     while True:
+        # simulation frequency control, ahead of the pause check so that a
+        # paused simulation also sleeps out each frame
+        if sim_freq_control or sim_haulted:
+            sim_clock.tick(1000.0/frame_period)
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:  # close window button is clicked
                 print("program exit in simulation 4")
@@ -1337,14 +1355,6 @@ while True:
                     sim_haulted = not sim_haulted  # reverse the pause flag
         if sim_haulted: continue
 
-        # simulation frequency control
-        if sim_freq_control:
-            time_now = pygame.time.get_ticks()
-            if (time_now - time_last) > frame_period:
-                time_last = time_now
-            else:
-                continue
-
         # increase iteration count
         iter_count = iter_count + 1
         # sys.stdout.write("\riteration {}".format(iter_count))
@@ -1577,7 +1587,7 @@ while True:
             groups[group_id_temp][1] = groups[group_id_temp][1] + life_incre
         # 3.st_0to2, robot '0' forms new group with '0', both becoming '2'
         while len(st_0to2.keys()) != 0:
-            pair0 = st_0to2.keys()[0]
+            pair0 = list(st_0to2.keys())[0]
             pair1 = st_0to2[pair0]
             st_0to2.pop(pair0)
             if (pair1 in st_0to2.keys()) and (st_0to2[pair1] == pair0):
@@ -1585,9 +1595,9 @@ while True:
                 # only forming a group if there is at least one seed robot in the pair
                 if robot_seeds[pair0] or robot_seeds[pair1]:
                     # forming new group for robot pair0 and pair1
-                    group_id_temp = np.random.randint(0, group_id_upper)
+                    group_id_temp = rng.integers(0, group_id_upper)
                     while group_id_temp in groups.keys():
-                        group_id_temp = np.random.randint(0, group_id_upper)
+                        group_id_temp = rng.integers(0, group_id_upper)
                     # update properties of the robots
                     robot_states[pair0] = 2
                     robot_states[pair1] = 2
@@ -1601,9 +1611,9 @@ while True:
         for group_id_temp in st_gton1:
             for robot_temp in groups[group_id_temp][0]:
                 robot_states[robot_temp] = -1
-                robot_n1_lives[robot_temp] = np.random.uniform(n1_life_lower, n1_life_upper)
+                robot_n1_lives[robot_temp] = rng.uniform(n1_life_lower, n1_life_upper)
                 robot_group_ids[robot_temp] = -1
-                robot_oris[robot_temp] = np.random.rand() * 2 * math.pi - math.pi
+                robot_oris[robot_temp] = rng.uniform(-math.pi, math.pi)
                 robot_key_neighbors[robot_temp] = []
             groups.pop(group_id_temp)
         # 5.st_n1to0, life time of robot '-1' ends, get back to '0'
@@ -1702,19 +1712,12 @@ while True:
         # update the graphics
         disp_poses_update()
         screen.fill(color_white)
-        # draw the robots of states '-1' and '0'
+        # draw the robots of states '-1' and '0', empty circle for '-1', full for '0'
+        screen.blits([(single_sprites[robot_seeds[i], robot_states[i]],
+            disp_poses[i]-robot_size_formation) for i in range(swarm_size)
+            if robot_states[i] in (-1, 0)], False)
+        # draw text of the assigned roles for all robots
         for i in range(swarm_size):
-            if robot_seeds[i]:
-                color_temp = color_red
-            else:
-                color_temp = color_grey
-            if robot_states[i] == -1:  # empty circle for state '-1' robot
-                pygame.draw.circle(screen, color_temp, disp_poses[i],
-                    robot_size_formation, robot_width_empty)
-            elif robot_states[i] == 0:  # full circle for state '0' robot
-                pygame.draw.circle(screen, color_temp, disp_poses[i],
-                    robot_size_formation, 0)
-            # draw text of the assigned roles for all robots
             text = font.render(str(int(assignment_scheme[i])), True, color_grey)
             # text = font.render(str(int(i)), True, color_grey)
             screen.blit(text, (disp_poses[i,0]+6, disp_poses[i,1]-6))
@@ -1752,7 +1755,7 @@ while True:
 
         # check exit condition of simulation 4
         if not loop_formed:
-            if ((len(groups.keys()) == 1) and (len(groups.values()[0][0]) == swarm_size)
+            if ((len(groups.keys()) == 1) and (len(list(groups.values())[0][0]) == swarm_size)
                 and no_state1_robot):
                 loop_formed = True
         if loop_formed:
@@ -1785,7 +1788,7 @@ while True:
     print("chosen shape {}: {}".format(shape_decision, shape_catalog[shape_decision]))
 
     # # force the choice of shape, for video recording
-    # if len(force_shape_set) == 0: force_shape_set = range(shape_quantity)
+    # if len(force_shape_set) == 0: force_shape_set = list(range(shape_quantity))
     # force_choice = np.random.choice(force_shape_set)
     # force_shape_set.remove(force_choice)
     # shape_decision = force_choice
@@ -1809,8 +1812,8 @@ while True:
     filename = str(swarm_size) + "-" + shape_catalog[shape_decision]
     filepath = os.path.join(os.getcwd(), loop_folder, filename)
     if os.path.isfile(filepath):
-        with open(filepath, 'r') as f:
-            target_poses = pickle.load(f)
+        with open(filepath, 'rb') as f:
+            target_poses = pickle.load(f, encoding='latin1')  # pickled by python 2
     else:
         print("fail to locate shape file: {}".format(filepath))
         sys.exit()
@@ -1850,13 +1853,17 @@ while True:
 
     # the loop for simulation 5
     sim_haulted = False
-    time_last = pygame.time.get_ticks()
-    time_now = time_last
+    sim_clock = pygame.time.Clock()  # sleeps out the rest of each frame
     frame_period = 100
     sim_freq_control = True
     iter_count = 0
     print("loop is reshaping to " + shape_catalog[shape_decision] + " ...")
     while True:
+        # simulation frequency control, ahead of the pause check so that a
+        # paused simulation also sleeps out each frame
+        if sim_freq_control or sim_haulted:
+            sim_clock.tick(1000.0/frame_period)
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:  # close window button is clicked
                 print("program exit in simulation 5")
@@ -1866,14 +1873,6 @@ while True:
                     sim_haulted = not sim_haulted  # reverse the pause flag
         if sim_haulted: continue
 
-        # simulation frequency control
-        if sim_freq_control:
-            time_now = pygame.time.get_ticks()
-            if (time_now - time_last) > frame_period:
-                time_last = time_now
-            else:
-                continue
-
         # increase iteration count
         iter_count = iter_count + 1
 
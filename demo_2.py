@@ -23,11 +23,13 @@
 # Added a stretching process in simulation 3, before the loop reshapes to the target. Because
 # the loop may get tangled if reshaping directly from previous loop formation.
 
+# Dependencies: pygame, numpy, and scipy for the pairwise robot distances (pdist).
+
 
-from __future__ import print_function
 import pygame
 import sys, os, getopt, math
 import numpy as np
+from scipy.spatial.distance import pdist, squareform
 import pickle
 
 swarm_size = 30  # default swarm size
@@ -63,6 +65,7 @@ screen_size = (screen_side_length, screen_side_length)  # square display world
 
 # formation configuration
 comm_range = 0.65  # communication range in the world
+comm_range_sq = comm_range * comm_range  # for comparing with squared distances
 desired_space_ratio = 0.8  # ratio of the desired space to the communication range
     # should be larger than 1/1.414=0.71, to avoid connections crossing each other
 desired_space = comm_range * desired_space_ratio
@@ -77,42 +80,51 @@ shape_quantity = len(shape_catalog)  # the number of decisions
 shape_decision = -1  # the index of chosen decision, in range(shape_quantity)
     # also the index in shape_catalog
 # variable to force shape to different choices, for video recording
-force_shape_set = range(shape_quantity)
+force_shape_set = list(range(shape_quantity))
+
+# random number generator for all the random quantities in the simulations
+rng = np.random.default_rng()
 
 # robot properties
-robot_poses = np.random.rand(swarm_size, 2) * world_side_length  # initialize the robot poses
+robot_poses = rng.random((swarm_size, 2)) * world_side_length  # initialize the robot poses
 dist_table = np.zeros((swarm_size, swarm_size))  # distances between robots
 conn_table = np.zeros((swarm_size, swarm_size))  # connections between robots
     # 0 for disconnected, 1 for connected
 conn_lists = [[] for i in range(swarm_size)]  # lists of robots connected
+# robot pair of each entry in the condensed pdist output, fixed for the swarm size
+tri_i, tri_j = np.triu_indices(swarm_size, 1)
 # function for all simulations, update the distances and connections between the robots
 def dist_conn_update():
     global dist_table
     global conn_table
     global conn_lists
-    conn_lists = [[] for i in range(swarm_size)]  # empty the lists
-    for i in range(swarm_size):
-        for j in range(i+1, swarm_size):
-            dist_temp = np.linalg.norm(robot_poses[i] - robot_poses[j])
-            dist_table[i,j] = dist_temp
-            dist_table[j,i] = dist_temp
-            if dist_temp > comm_range:
-                conn_table[i,j] = 0
-                conn_table[j,i] = 0
-            else:
-                conn_table[i,j] = 1
-                conn_table[j,i] = 1
-                conn_lists[i].append(j)
-                conn_lists[j].append(i)
+    # squared distances of the upper triangle pairs, checked against the range in one pass
+    dist_sq = pdist(robot_poses, 'sqeuclidean')
+    conn_mask = dist_sq <= comm_range_sq
+    conn_i = tri_i[conn_mask]
+    conn_j = tri_j[conn_mask]
+    conn_table = np.zeros((swarm_size, swarm_size))
+    conn_table[conn_i, conn_j] = 1
+    conn_table[conn_j, conn_i] = 1
+    dist_table = squareform(np.sqrt(dist_sq))
+    # CSR adjacency from both directions of the connected pairs, grouped by robot
+    # (the lower side neighbors go first, so that each robot's list stays ascending)
+    conn_degrees = (np.bincount(conn_i, minlength=swarm_size) +
+        np.bincount(conn_j, minlength=swarm_size))
+    conn_indptr = np.concatenate(([0], np.cumsum(conn_degrees))).tolist()
+    conn_rows = np.concatenate((conn_j, conn_i))
+    conn_cols = np.concatenate((conn_i, conn_j))[np.argsort(conn_rows, kind='stable')].tolist()
+    conn_lists = [conn_cols[conn_indptr[i]:conn_indptr[i+1]] for i in range(swarm_size)]
 dist_conn_update()  # update the distances and connections
-disp_poses = []  # display positions
-# function for all simulations, update the display positions
+disp_poses = np.zeros((swarm_size, 2), dtype=int)  # display positions
+disp_poses_buf = np.zeros((swarm_size, 2))  # reused buffer for the conversion
+disp_scale = screen_side_length / world_side_length  # world length to screen pixels
+# function for all simulations, update the display positions in place
 def disp_poses_update():
-    global disp_poses
-    poses_temp = robot_poses / world_side_length
-    poses_temp[:,1] = 1.0 - poses_temp[:,1]
-    poses_temp = poses_temp * screen_side_length
-    disp_poses = poses_temp.astype(int)  # convert to int and assign to disp_poses
+    # one affine map per axis, y axis is flipped by subtracting from the screen side
+    np.multiply(robot_poses, disp_scale, out=disp_poses_buf)
+    np.subtract(screen_side_length, disp_poses_buf[:,1], out=disp_poses_buf[:,1])
+    disp_poses[:] = disp_poses_buf  # truncated to int, same as astype(int)
 disp_poses_update()
 # deciding the seed robots, used in simulations with moving robots
 seed_percentage = 0.1  # the percentage of seed robots in the swarm
@@ -121,7 +133,7 @@ seed_quantity = min(max(int(swarm_size*seed_percentage), 1), swarm_size)
 robot_seeds = [False for i in range(swarm_size)]  # whether a robot is a seed robot
     # only seed robot can initialize the forming a new group
 seed_list_temp = np.arange(swarm_size)
-np.random.shuffle(seed_list_temp)
+rng.shuffle(seed_list_temp)
 for i in seed_list_temp[:seed_quantity]:
     robot_seeds[i] = True
 
@@ -145,16 +157,29 @@ conn_width_thick_consensus = 4
 
 # set up the simulation window
 pygame.init()
+# only the close button and key releases are handled, keep other events out of the queue
+pygame.event.set_blocked(None)
+pygame.event.set_allowed([pygame.QUIT, pygame.KEYUP])
 font = pygame.font.SysFont("Cabin", 12)
 icon = pygame.image.load("icon_geometry_art.jpg")
 pygame.display.set_icon(icon)
 screen = pygame.display.set_mode(screen_size)
 pygame.display.set_caption("Demo 2")
+# pre-rendered robot sprites, so that many robots can be drawn by one screen.blits() call
+def robot_sprite(color, radius, width):
+    sprite = pygame.Surface((2*radius+1, 2*radius+1), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, color, (radius, radius), radius, width)
+    return sprite
+# sprites for the single robots in formation simulations, key is (being seed, state)
+single_sprites = {(True, -1): robot_sprite(color_red, robot_size, robot_empty_width),
+    (True, 0): robot_sprite(color_red, robot_size, 0),
+    (False, -1): robot_sprite(color_grey, robot_size, robot_empty_width),
+    (False, 0): robot_sprite(color_grey, robot_size, 0)}
 # draw the network
 screen.fill(color_white)
-for i in range(swarm_size):
-    pygame.draw.circle(screen, color_black, disp_poses[i], robot_size,
-        robot_empty_width)
+sprite_temp = robot_sprite(color_black, robot_size, robot_empty_width)
+screen.blits([(sprite_temp, disp_poses[i]-robot_size)
+    for i in range(swarm_size)], False)
 pygame.display.update()
 
 # pause to check the network before the simulations, or for screen recording
@@ -263,8 +288,8 @@ robot_states = np.array([-1 for i in range(swarm_size)])
     # '2' for in a group, both key neighbors secured
 n1_life_lower = 2  # inclusive
 n1_life_upper = 6  # exclusive
-robot_n1_lives = np.random.uniform(n1_life_lower, n1_life_upper, swarm_size)
-robot_oris = np.random.rand(swarm_size) * 2 * math.pi - math.pi  # in range of [-pi, pi)
+robot_n1_lives = rng.uniform(n1_life_lower, n1_life_upper, swarm_size)
+robot_oris = rng.uniform(-math.pi, math.pi, swarm_size)  # in range of [-pi, pi)
 robot_key_neighbors = [[] for i in range(swarm_size)]  # key neighbors for robot on loop
     # for state '1' robot: one key neighbor
     # for state '2' robot: two key neighbor on its left and right sides
@@ -294,8 +319,7 @@ space_good_thres = desired_space * 0.85
 
 # the loop for simulation 1
 sim_haulted = False
-time_last = pygame.time.get_ticks()
-time_now = time_last
+sim_clock = pygame.time.Clock()  # sleeps out the rest of each frame
 frame_period = 50
 sim_freq_control = True
 iter_count = 0
@@ -303,6 +327,11 @@ loop_formed = False
 ending_period = 1.0  # grace period
 print("swarm robots are forming a random loop ...")
 while True:
+    # simulation frequency control, ahead of the pause check so that a
+    # paused simulation also sleeps out each frame
+    if sim_freq_control or sim_haulted:
+        sim_clock.tick(1000.0/frame_period)
+
     for event in pygame.event.get():
         if event.type == pygame.QUIT:  # close window button is clicked
             print("program exit in simulation 1")
@@ -312,14 +341,6 @@ while True:
                 sim_haulted = not sim_haulted  # reverse the pause flag
     if sim_haulted: continue
 
-    # simulation frequency control
-    if sim_freq_control:
-        time_now = pygame.time.get_ticks()
-        if (time_now - time_last) > frame_period:
-            time_last = time_now
-        else:
-            continue
-
     # increase iteration count
     iter_count = iter_count + 1
 
@@ -521,9 +542,9 @@ while True:
             # only forming a group if there is at least one seed robot in the pair
             if robot_seeds[pair0] or robot_seeds[pair1]:
                 # forming new group for robot pair0 and pair1
-                group_id_temp = np.random.randint(0, group_id_upper)
+                group_id_temp = rng.integers(0, group_id_upper)
                 while group_id_temp in groups.keys():
-                    group_id_temp = np.random.randint(0, group_id_upper)
+                    group_id_temp = rng.integers(0, group_id_upper)
                 # update properties of the robots
                 robot_states[pair0] = 2
                 robot_states[pair1] = 2
@@ -537,9 +558,9 @@ while True:
     for group_id_temp in st_gton1:
         for robot_temp in groups[group_id_temp][0]:
             robot_states[robot_temp] = -1
-            robot_n1_lives[robot_temp] = np.random.uniform(n1_life_lower, n1_life_upper)
+            robot_n1_lives[robot_temp] = rng.uniform(n1_life_lower, n1_life_upper)
             robot_group_ids[robot_temp] = -1
-            robot_oris[robot_temp] = np.random.rand() * 2 * math.pi - math.pi
+            robot_oris[robot_temp] = rng.uniform(-math.pi, math.pi)
             robot_key_neighbors[robot_temp] = []
         groups.pop(group_id_temp)
     # 5.st_n1to0, life time of robot '-1' ends, get back to '0'
@@ -650,18 +671,10 @@ while True:
     # update the graphics
     disp_poses_update()
     screen.fill(color_white)
-    # draw the robots of states '-1' and '0'
-    for i in range(swarm_size):
-        if robot_seeds[i]:
-            color_temp = color_red
-        else:
-            color_temp = color_grey
-        if robot_states[i] == -1:  # empty circle for state '-1' robot
-            pygame.draw.circle(screen, color_temp, disp_poses[i],
-                robot_size, robot_empty_width)
-        elif robot_states[i] == 0:  # full circle for state '0' robot
-            pygame.draw.circle(screen, color_temp, disp_poses[i],
-                robot_size, 0)
+    # draw the robots of states '-1' and '0', empty circle for '-1', full for '0'
+    screen.blits([(single_sprites[robot_seeds[i], robot_states[i]],
+        disp_poses[i]-robot_size) for i in range(swarm_size)
+        if robot_states[i] in (-1, 0)], False)
     # draw the in-group robots by group
     for group_id_temp in groups.keys():
         if groups[group_id_temp][2]:
@@ -766,7 +779,7 @@ while True:
 
     # initialize the decision making variables
     shape_decision = -1
-    deci_dist = np.random.rand(swarm_size, shape_quantity)
+    deci_dist = rng.random((swarm_size, shape_quantity))
     sum_temp = np.sum(deci_dist, axis=1)
     for i in range(swarm_size):
         deci_dist[i] = deci_dist[i] / sum_temp[i]
@@ -786,14 +799,19 @@ while True:
 
     # the loop for simulation 2
     sim_haulted = False
-    time_last = pygame.time.get_ticks()
-    time_now = time_last
+    sim_clock = pygame.time.Clock()  # sleeps out the rest of each frame
     frame_period = 500
     sim_freq_control = True
+    event_period = 50  # frame for handling the events, in ms
+    time_last = pygame.time.get_ticks() - frame_period  # first iteration runs at once
     iter_count = 0
     sys.stdout.write("iteration {}".format(iter_count))
     sys.stdout.flush()
     while True:
+        # short frames for handling the events, also while paused
+        if sim_freq_control or sim_haulted:
+            sim_clock.tick(1000.0/event_period)
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:  # close window button is clicked
                 print("program exit in simulation 2")
@@ -803,13 +821,11 @@ while True:
                     sim_haulted = not sim_haulted  # reverse the pause flag
         if sim_haulted: continue
 
-        # simulation frequency control
+        # simulation frequency control, run one iteration once the period has passed
         if sim_freq_control:
             time_now = pygame.time.get_ticks()
-            if (time_now - time_last) > frame_period:
-                time_last = time_now
-            else:
-                continue
+            if time_now - time_last < frame_period: continue
+            time_last = time_now
 
         # increase iteration count
         iter_count = iter_count + 1
@@ -847,12 +863,12 @@ while True:
         # update colors for the decisions
         if not color_initialized:
             color_initialized = True
-            color_set = range(color_quantity)
+            color_set = list(range(color_quantity))
             deci_set = set(group_deci)
             for deci in deci_set:
                 if len(color_set) == 0:
-                    color_set = range(color_quantity)
-                chosen_color = np.random.choice(color_set)
+                    color_set = list(range(color_quantity))
+                chosen_color = rng.choice(color_set)
                 color_set.remove(chosen_color)
                 deci_colors[deci] = chosen_color
                 color_assigns[chosen_color] = color_assigns[chosen_color] + 1
@@ -875,7 +891,7 @@ while True:
                             if color_assigns[color_temp] == color_assigns_min:
                                 color_set.append(color_temp)
                     # if here, the color set is good to go
-                    chosen_color = np.random.choice(color_set)
+                    chosen_color = rng.choice(color_set)
                     color_set.remove(chosen_color)
                     deci_colors[group_deci[i]] = chosen_color
                     color_assigns[chosen_color] = color_assigns[chosen_color] + 1
@@ -916,7 +932,7 @@ while True:
                     large_end = 2.0/shape_quantity - small_end
                     # sort the magnitude of processed distribution
                     dist_t = np.copy(deci_dist[i])  # temporary distribution
-                    sort_index = range(shape_quantity)
+                    sort_index = list(range(shape_quantity))
                     for j in range(shape_quantity-1):  # bubble sort, ascending order
                         for k in range(shape_quantity-1-j):
                             if dist_t[k] > dist_t[k+1]:
@@ -986,8 +1002,8 @@ while True:
     print("chosen shape {}: {}".format(shape_decision, shape_catalog[shape_decision]))
 
     # force the choice of shape, for video recording
-    if len(force_shape_set) == 0: force_shape_set = range(shape_quantity)
-    force_choice = np.random.choice(force_shape_set)
+    if len(force_shape_set) == 0: force_shape_set = list(range(shape_quantity))
+    force_choice = rng.choice(force_shape_set)
     force_shape_set.remove(force_choice)
     shape_decision = force_choice
     print("force shape to {}: {} (for video recording)".format(shape_decision,
@@ -997,8 +1013,8 @@ while True:
     filename = str(swarm_size) + "-" + shape_catalog[shape_decision]
     filepath = os.path.join(os.getcwd(), loop_folder, filename)
     if os.path.isfile(filepath):
-        with open(filepath, 'r') as f:
-            target_poses = pickle.load(f)
+        with open(filepath, 'rb') as f:
+            target_poses = pickle.load(f, encoding='latin1')  # pickled by python 2
     else:
         print("fail to locate shape file: {}".format(filepath))
         sys.exit()
@@ -1025,7 +1041,7 @@ while True:
     pygame.display.update()
 
     # initialize the decision making variables
-    pref_dist = np.random.rand(swarm_size, swarm_size)
+    pref_dist = rng.random((swarm_size, swarm_size))
     sum_temp = np.sum(pref_dist, axis=1)
     for i in range(swarm_size):
         pref_dist[i] = pref_dist[i] / sum_temp[i]
@@ -1056,8 +1072,7 @@ while True:
 
     # the loop for simulation 3
     sim_haulted = False
-    time_last = pygame.time.get_ticks()
-    time_now = time_last
+    sim_clock = pygame.time.Clock()  # sleeps out the rest of each frame
     frame_period = 200
     sim_freq_control = True
     print("loop is stretching ...")
@@ -1065,6 +1080,11 @@ while True:
     # sys.stdout.write("iteration {}".format(iter_count))
     # sys.stdout.flush()
     while True:
+        # simulation frequency control, ahead of the pause check so that a
+        # paused simulation also sleeps out each frame
+        if sim_freq_control or sim_haulted:
+            sim_clock.tick(1000.0/frame_period)
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:  # close window button is clicked
                 print("program exit in simulation 3")
@@ -1074,14 +1094,6 @@ while True:
                     sim_haulted = not sim_haulted  # reverse the pause flag
         if sim_haulted: continue
 
-        # simulation frequency control
-        if sim_freq_control:
-            time_now = pygame.time.get_ticks()
-            if (time_now - time_last) > frame_period:
-                time_last = time_now
-            else:
-                continue
-
         # increase iteration count
         iter_count = iter_count + 1
         # sys.stdout.write("\riteration {}".format(iter_count))
@@ -1120,12 +1132,12 @@ while True:
         # update colors for the decisions
         if not color_initialized:
             color_initialized = True
-            color_set = range(color_quantity)
+            color_set = list(range(color_quantity))
             deci_set = set(group_deci)
             for deci in deci_set:
                 if len(color_set) == 0:
-                    color_set = range(color_quantity)
-                chosen_color = np.random.choice(color_set)
+                    color_set = list(range(color_quantity))
+                chosen_color = rng.choice(color_set)
                 color_set.remove(chosen_color)
                 deci_colors[deci] = chosen_color
                 color_assigns[chosen_color] = color_assigns[chosen_color] + 1
@@ -1148,7 +1160,7 @@ while True:
                             if color_assigns[color_temp] == color_assigns_min:
                                 color_set.append(color_temp)
                     # if here, the color set is good to go
-                    chosen_color = np.random.choice(color_set)
+                    chosen_color = rng.choice(color_set)
                     color_set.remove(chosen_color)
                     deci_colors[group_deci[i]] = chosen_color
                     color_assigns[chosen_color] = color_assigns[chosen_color] + 1
@@ -1197,7 +1209,7 @@ while True:
                     large_end = 2.0/swarm_size - small_end
                     # sort the magnitude of processed distribution
                     dist_t = np.copy(pref_dist[i])  # temporary distribution
-                    sort_index = range(swarm_size)
+                    sort_index = list(range(swarm_size))
                     for j in range(swarm_size-1):  # bubble sort, ascending order
                         for k in range(swarm_size-1-j):
                             if dist_t[k] > dist_t[k+1]:
@@ -31,6 +31,7 @@
 
 import pygame
 import math, random
+import numpy as np
 from line_formation_2_robot import LFRobot
 from formation_functions import *
 
@@ -48,6 +49,7 @@ robot_0_color = (0, 255, 0)  # for robot status '0', green
 robot_1_color = (255, 153, 153)  # for robot status '1', pink
 robot_2_color = (255, 51, 0)  # for robot status '2', red
 robot_n1_color = (0, 51, 204)  # for robot status '-1', blue
+robot_colors = {0: robot_0_color, 1: robot_1_color, 2: robot_2_color, -1: robot_n1_color}
 robot_size = 5  # robot modeled as dot, number of pixels in radius
 
 # set up the simulation window and surface object
@@ -67,12 +69,13 @@ robot_quantity = 30
 distrib_coef = 0.5
 const_vel = 3.0  # all robots except '2' are moving at this faster constant speed
 frame_period = 100  # updating period of the simulation and graphics, in ms
+frame_dt = frame_period/1000.0  # the same period in seconds, for the physics and timers
 comm_range = 5.0  # sensing and communication range, the radius
+comm_range_sq = comm_range * comm_range  # for comparing with squared distances
 line_space = comm_range * 0.7  # line space, between half of and whole communication range
 merge_min_dist = line_space * 0.7  # minimum distance between two robots to allow merge
 space_err = line_space * 0.1  # error to determine the space is good when robot arrives
 life_incre = 8  # number of seconds a new member adds to a group
-group_id_upper_limit = 1000  # upper limit of random integer for group id
 n1_life_lower = 3  # lower limit of life time for status '-1'
 n1_life_upper = 8  # upper limit of life time for status '-1'
 # coefficient for calculating velocity of robot '2' on the line for adjusting
@@ -80,15 +83,17 @@ n1_life_upper = 8  # upper limit of life time for status '-1'
 # tune this parameter to adjust the line more quickly and stably
 adjust_vel_coef = const_vel/line_space * 2
 
+# positions of all robots in one array, the 'pos' of each robot is a row view of it
+robot_poses = np.zeros((robot_quantity, 2))
 # instantiate the robot swarm as list
 robots = []  # container for all robots, index is its identification
 for i in range(robot_quantity):
     # random position, away from the window's edges
-    pos_temp = (((random.random()-0.5)*distrib_coef+0.5) * world_size[0],
-                ((random.random()-0.5)*distrib_coef+0.5) * world_size[1])
+    robot_poses[i] = (((random.random()-0.5)*distrib_coef+0.5) * world_size[0],
+                      ((random.random()-0.5)*distrib_coef+0.5) * world_size[1])
     vel_temp = const_vel
     ori_temp = random.random() * 2*math.pi - math.pi  # random in (-pi, pi)
-    object_temp = LFRobot(pos_temp, vel_temp, ori_temp)
+    object_temp = LFRobot(robot_poses[i], vel_temp, ori_temp)
     robots.append(object_temp)
 # instantiate the group variable as dictionary
 groups = {}
@@ -99,16 +104,91 @@ groups = {}
         # 2.third element: a list of robots on the line in adjacent order, status '2'
         # 3.fourth element: a list of robots off the line, not in order, status '1'
         # 4.fifth element: true or false, being the domianant group
+next_group_id = 0  # id for the next new group, increases by one for each group
 # instantiate a distance table for every pair of robots
 # make sure all data in table is being written when updating
-dist_table = [[0 for j in range(robot_quantity)] for i in range(robot_quantity)]
+dist_table = np.zeros((robot_quantity, robot_quantity))
+
+# group attribution of a list of robots, return a dictionary
+# key is the group id, value is a list of the robots in that group, in the input order
+def group_attribution(robot_list, robot_group_ids):
+    groups_temp = {}
+    for j in robot_list:
+        groups_temp.setdefault(robot_group_ids[j], []).append(j)
+    return groups_temp
+
+# reset_radian() for an array of angles, wraps each angle into [-pi, pi) the same way
+def reset_radians(radians):
+    radians = np.array(radians, dtype=float)
+    while True:
+        out_temp = radians >= math.pi
+        if not out_temp.any(): break
+        radians[out_temp] -= 2*math.pi
+    while True:
+        out_temp = radians < -math.pi
+        if not out_temp.any(): break
+        radians[out_temp] += 2*math.pi
+    return radians
+
+# merging destination that extends the line by one line space at its end
+# 'pos_end' is the robot at the end of the line, 'pos_in' is its neighbor inward the line
+def line_extension(pos_end, pos_in):
+    vect_x = pos_end[0] - pos_in[0]  # from pos_in to pos_end
+    vect_y = pos_end[1] - pos_in[1]
+    dist_temp = math.hypot(vect_x, vect_y)
+    if dist_temp == 0:
+        # two robots on the same spot, no direction for the line, extend along x
+        return [pos_end[0] + line_space, pos_end[1]]
+    # scale the vector to line space, no need for the angle of the line
+    scale_temp = line_space / dist_temp
+    return [pos_end[0] + vect_x*scale_temp, pos_end[1] + vect_y*scale_temp]
+
+# 'explosion' directions of the robots on a disassembling line, return a list of
+# orientations in the order of the line, all robots are calculated at once
+def line_explosion(line_robots, robot_list, poses):
+    num_online = len(line_robots)  # number of robots on the line
+    if num_online == 0: return []  # group still in initial forming
+    num_1_half = num_online//2  # number of robots for the first half
+    num_2_half = num_online - num_1_half  # for the second half
+    line_indices = np.array(line_robots)
+    seqs = np.array([robot_list[i].status_2_sequence for i in line_robots])
+    ends = np.array([robot_list[i].status_2_end for i in line_robots])
+    first_half = seqs < num_1_half
+    # orientation of the line for each robot, pointing from 'it_from' to 'it_to'
+    # for robots at no end, from the neighbor on one side to the one on the other
+    it_prev = line_indices[np.maximum(seqs-1, 0)]
+    it_next = line_indices[np.minimum(seqs+1, num_online-1)]
+    it_to = np.where(first_half, it_prev, it_next)
+    it_from = np.where(first_half, it_next, it_prev)
+    # at the small index end, from the second one on the line to the robot itself
+    on_end = seqs == 0
+    it_to[on_end] = line_indices[on_end]
+    it_from[on_end] = line_indices[1]
+    # at the large index end, from the inverse second one to the robot itself
+    on_end = (seqs != 0) & ends
+    it_to[on_end] = line_indices[on_end]
+    it_from[on_end] = line_indices[-2]
+    vects = poses[it_to] - poses[it_from]
+    oris = np.arctan2(vects[:,1], vects[:,0])
+    # always 'explode' to the left side
+    oris = reset_radians(oris + np.where(first_half, math.pi*(seqs+1)/(num_1_half+1),
+                                        math.pi*(num_online-seqs)/(num_2_half+1)))
+    return oris.tolist()
+
+# math functions bound once as plain names for the per-frame updates in the loop
+atan2 = math.atan2
+hypot = math.hypot
+pi = math.pi
 
 # the loop
 sim_exit = False  # simulation exit flag
 sim_pause = False  # simulation pause flag
-timer_last = pygame.time.get_ticks()  # return number of milliseconds after pygame.init()
-timer_now = timer_last  # initialize it with timer_last
+sim_clock = pygame.time.Clock()  # sleeps out the rest of each frame
 while not sim_exit:
+    # wait for the next frame, the physics, control rules and graphics are updated
+    # once every frame period
+    sim_clock.tick(1000.0/frame_period)
+
     # exit the program
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
@@ -122,806 +202,674 @@ while not sim_exit:
     # skip the rest of the loop if paused
     if sim_pause: continue
 
-    # update the physics, control rules and graphics at the same time
-    timer_now = pygame.time.get_ticks()
-    if (timer_now - timer_last) > frame_period:
-        timer_last = timer_now  # reset timer
-        # prepare the distance data for every pair of robots
-        for i in range(robot_quantity):
-            for j in range(i+1, robot_quantity):
-                # status of '-1' does not involve in any connection, so skip
-                if (robots[i].status == -1) or (robots[j].status == -1):
-                    dist_table[i][j] = -1.0
-                    dist_table[j][i] = -1.0
-                    continue  # skip the rest
-                # it only covers the upper triangle without the diagonal
-                vect_temp = (robots[i].pos[0]-robots[j].pos[0],
-                            robots[i].pos[1]-robots[j].pos[1])
-                dist_temp = math.sqrt(vect_temp[0]*vect_temp[0] +
-                                      vect_temp[1]*vect_temp[1])
-                if dist_temp <= comm_range:
-                    # only record distance smaller than communication range
-                    dist_table[i][j] = dist_temp
-                    dist_table[j][i] = dist_temp
-                else:  # ignore the neighbors too far away
-                    dist_table[i][j] = -1.0
-                    dist_table[j][i] = -1.0
-        # sort the distance in another table, record the index here
-        index_list = [[] for i in range(robot_quantity)]  # index of neighbors in range
-        # find all robots with non-zero distance
-        for i in range(robot_quantity):
-            for j in range(robot_quantity):
-                if j == i: continue  # skip the self, not necessary
-                if dist_table[i][j] > 0: index_list[i].append(j)
-        # sort the index_list in the order of increasing distance
-        for i in range(robot_quantity):
-            len_temp = len(index_list[i])  # number of neighbors
-            if (len_temp < 2): continue  # no need to sort
-            else:
-                # bubble sort
-                for j in range(len_temp-1):
-                    for k in range(len_temp-1-j):
-                        if (dist_table[i][index_list[i][k]] >
-                            dist_table[i][index_list[i][k+1]]):
-                           # swap the position of the two index
-                           index_temp = index_list[i][k]
-                           index_list[i][k] = index_list[i][k+1]
-                           index_list[i][k+1] = index_temp
-        # get the status list corresponds to the sorted index_list
-        status_list = [[] for i in range(robot_quantity)]
-        for i in range(robot_quantity):
-            for j in index_list[i]:
-                status_list[i].append(robots[j].status)
+    # prepare the distance data for every pair of robots, all pairs at once
+    robot_statuses = np.array([robot.status for robot in robots])
+    vect_temp = robot_poses[:,np.newaxis,:] - robot_poses[np.newaxis,:,:]
+    dist_sq = vect_temp[:,:,0]*vect_temp[:,:,0] + vect_temp[:,:,1]*vect_temp[:,:,1]
+    # only record distance smaller than communication range, the square root is taken
+    # only for these pairs, and the neighbors too far away are ignored
+    dist_table.fill(-1.0)
+    np.sqrt(dist_sq, out=dist_table, where=(dist_sq <= comm_range_sq))
+    # status of '-1' does not involve in any connection
+    dist_table[robot_statuses == -1,:] = -1.0
+    dist_table[:,robot_statuses == -1] = -1.0
+    np.fill_diagonal(dist_table, 0.0)  # the diagonal is not used
+    # sort the distance in another table, record the index here
+    # robots with non-zero distance are the neighbors in range, the others are pushed
+    # to the end of each row; stable sort keeps equal distances in the order of index
+    index_sorted = np.argsort(np.where(dist_table > 0, dist_table, np.inf),
+                              axis=1, kind='stable')
+    neighbor_quantity = np.count_nonzero(dist_table > 0, axis=1)
+    # index of neighbors in range, in the order of increasing distance
+    index_list = [index_row[:quantity_temp].tolist()
+                  for index_row, quantity_temp in zip(index_sorted, neighbor_quantity)]
+    # group ids of all robots, the status check only reads them from this list
+    robot_group_ids = [robot.group_id for robot in robots]
+    # merge availability of every robot, true if at least one side of it is available
+    # to be merged, checking both avail1 and avail2 of that side
+    robot_mergeable = np.array([
+        (robot.status_2_avail1[0] and robot.status_2_avail2[0]) or
+        (robot.status_2_avail1[1] and robot.status_2_avail2[1])
+        for robot in robots])
 
-        # instantiate the status transition variables, for the status check process
-        # the priority to process them is in the following order
-        s_grab_on = {}  # robot '0' grabs on robot '2', becoming '1'
-            # key is id of robot '0', value is id of robot '2'
-        s_init_form = {}  # robot '0' initial forms with another '0', becoming '1'
-            # key is id of robot '0' that discovers other robot '0' in range
-            # value is a list of robot '0's that are in range, in order of increasing distance
-        s_form_done = {}  # robot '1' finishes initial forming, becoming '2'
-            # key is group id
-            # value is a list of id of robot '1's that have finished initial forming
-        s_merge_done = []  # robot '1' finishes merging, becoming '2'
-            # list of robot '1' that finished merging
-        # s_form_lost = []  # robot '1' gets lost during initial forming
-        #     # list of group id for the initial forming robots
-        # s_merge_lost = []  # robot '1' gets lost during merging
-        #     # list of robot id for the merging robots
-        s_line_lost = []  # robot '2' gets lost during adjusting pos
-            # list of group id for the robots get lost in that group
-        s_group_exp = []  # life time of a group naturally expires
-            # life of group id
-        s_disassemble = []  # disassemble triggerred by robot '1' or '2'
-            # list of lists of group id to be compared for disassembling
-        s_back_0 = []  # robot '-1' gets  back to '0'
-            # list of robot id
+    # instantiate the status transition variables, for the status check process
+    # the priority to process them is in the following order
+    s_grab_on = {}  # robot '0' grabs on robot '2', becoming '1'
+        # key is id of robot '0', value is id of robot '2'
+    s_init_form = {}  # robot '0' initial forms with another '0', becoming '1'
+        # key is id of robot '0' that discovers other robot '0' in range
+        # value is a list of robot '0's that are in range, in order of increasing distance
+    s_form_done = {}  # robot '1' finishes initial forming, becoming '2'
+        # key is group id
+        # value is a list of id of robot '1's that have finished initial forming
+    s_merge_done = []  # robot '1' finishes merging, becoming '2'
+        # list of robot '1' that finished merging
+    # s_form_lost = []  # robot '1' gets lost during initial forming
+    #     # list of group id for the initial forming robots
+    # s_merge_lost = []  # robot '1' gets lost during merging
+    #     # list of robot id for the merging robots
+    s_line_lost = []  # robot '2' gets lost during adjusting pos
+        # list of group id for the robots get lost in that group
+    s_group_exp = []  # life time of a group naturally expires
+        # life of group id
+    s_disassemble = []  # disassemble triggerred by robot '1' or '2'
+        # list of lists of group id to be compared for disassembling
+    s_back_0 = []  # robot '-1' gets  back to '0'
+        # list of robot id
 
-        # check 'robots' for any status change, schedule them for processing in next step
-        for i in range(robot_quantity):
-            # for the host robot having status of '0'
-            if robots[i].status == 0:
-                # check if this robot has valid neighbors at all
-                if len(index_list[i]) == 0: continue  # skip the neighbor check
-                # process neighbors with status '2', highest priority
-                if 2 in status_list[i]:
-                    # check the group attribution of all the '2'
-                    # get the robot id and group id of the first '2'
-                    current_index = status_list[i].index(2)
-                    current_robot = index_list[i][current_index]
-                    current_group = robots[current_robot].group_id
-                    groups_temp = {current_group: [current_robot]}
-                    # check if there is still '2' in the list
-                    while 2 in status_list[i][current_index+1:]:
-                        # indexing the next '2' from current_index+1
-                        # update the current_index, current_robot, current_group
-                        current_index = status_list[i].index(2, current_index+1)
-                        current_robot = index_list[i][current_index]
-                        current_group = robots[current_robot].group_id
-                        # update groups_temp
-                        if current_group in groups_temp.keys():
-                            # append this robot in the existing group
-                            groups_temp[current_group].append(current_robot)
-                        else:
-                            # add new group id in groups_temp and add this robot
-                            groups_temp[current_group] = [current_robot]
-                    # check if there are multiple groups detected from the '2'
-                    target_robot = 0  # the target robot to grab on
-                    if len(groups_temp.keys()) == 1:
-                        # there is only one group detected
-                        dist_min = 2*comm_range  # smallest distance, start with large one
-                        robot_min = -1  # corresponding robot with min distance
-                        # search the closest '2'
-                        for j in list(groups_temp.values())[0]:
-                            if dist_table[i][j] < dist_min:
-                                if ((robots[j].status_2_avail1[0] & robots[j].status_2_avail2[0]) |
-                                    (robots[j].status_2_avail1[1] & robots[j].status_2_avail2[1])):
-                                    # check both avail1 and avail2 for both side
-                                    # there is at least one side is available to be merged
-                                    dist_min = dist_table[i][j]
-                                    robot_min = j
-                        target_robot = robot_min
-                    else:
-                        # there is more than one group detected
-                        # it is designed that no disassembling trigger from robot '0'
-                        # compare which group has the most members in it
-                        member_max = 0  # start with 0 number of members in group
-                        group_max = 0  # corresponding group id with most members
-                        for j in groups_temp.keys():
-                            ## 'line_formation_1.py' did wrong in the following line
-                            # didn't fix it, not serious problem, program rarely goes here
-                            if groups[j][0] > member_max:
-                                member_max = groups[j][0]
-                                group_max = j
-                        # search the closest '2' inside that group
-                        dist_min = 2*comm_range
-                        robot_min = -1
-                        for j in groups_temp[group_max]:
-                            if dist_table[i][j] < dist_min:
-                                if ((robots[j].status_2_avail1[0] & robots[j].status_2_avail2[0]) |
-                                    (robots[j].status_2_avail1[1] & robots[j].status_2_avail2[1])):
-                                    dist_min = dist_table[i][j]
-                                    robot_min = j
-                        target_robot = robot_min
-                    # check if target robot has been located, prepare to grab on it
-                    if target_robot != -1:  # not the initial value of robot_min
-                        # the target robot should have at least one spot availbe to be merged
-                        s_grab_on[i] = target_robot
-                # process neighbors with status '1', second priority
-                elif 1 in status_list[i]:
-                    # find the closest '1' and get bounced away by it
-                    # still no trigger for disassembling if multiple groups exist in the '1's
-                    dist_min = 2*comm_range
-                    robot_min = -1
-                    for j in range(len(status_list[i])):
-                        if status_list[i][j] != 1: continue
-                        if dist_table[i][index_list[i][j]] < dist_min:
-                            dist_min = dist_table[i][index_list[i][j]]
-                            robot_min = index_list[i][j]
-                    # target robot located, the robot_min, should not still be -1 here
-                    # get bounced away from this robot, update the moving direction
-                    vect_temp = (robots[i].pos[0] - robots[robot_min].pos[0],
-                                 robots[i].pos[1] - robots[robot_min].pos[1])
-                    # orientation is pointing from robot_min to host
-                    robots[i].ori = math.atan2(vect_temp[1], vect_temp[0])
-                # process neighbors with status '0', least priority
-                else:
-                    # establish a list of all '0', in order of increasing distance
-                    # to be checked later if grouping is possible and no conflict
-                    # this list should be only '0's, already sorted
-                    target_list = index_list[i][:]
-                    # status transition scheduled, '0' forming initial group with '0'
-                    s_init_form[i] = target_list[:]
-            # for the host robot having status of '1'
-            elif robots[i].status == 1:
-                # status of '1' needs to be checked and maintained constantly
-                # 1.check if the important group neighbors are still in range (skiped)
-                # one of key neighbors of robot '1' may appears later when merging,
-                # and key_neighbor variable may has -1 value representing empty
-                # 2.disassemble check, get group attribution of all '1' and '2'
-                status_list_temp = status_list[i][:]
-                index_list_temp = index_list[i][:]
-                # pop out the '0' first
-                while 0 in status_list_temp:
-                    index_temp = status_list_temp.index(0)
-                    status_list_temp.pop(index_temp)
-                    index_list_temp.pop(index_temp)
-                if len(index_list_temp) > 0:  # ensure at least one in-group robot around
-                    # start the group attribution dictionary with first robot
-                    groups_temp = {robots[index_list_temp[0]].group_id: [index_list_temp[0]]}
-                    for j in index_list_temp[1:]:  # iterating from the second one
-                        current_group = robots[j].group_id
-                        if current_group in groups_temp.keys():
-                            # append this robot in same group
-                            groups_temp[current_group].append(j)
-                        else:
-                            # add new key in the groups_temp dictionary
-                            groups_temp[current_group] = [j]
-                    # check if there are multiple groups detected
-                    if len(groups_temp.keys()) > 1:
-                        # status transition scheduled, to disassemble groups
-                        s_disassemble.append(groups_temp.keys())
-                        # may produce duplicates in s_disassemble, not serious problem
-                # 3.check if any status transition needs to be done
-                if robots[i].status_1_sub == 0:
-                    # host robot is in the initial forming phase
-                    # check if the neighbor robot is in appropriate distance
-                    if abs(dist_table[i][robots[i].key_neighbors[0]] -
-                           line_space) < space_err:
-                        # status transition scheduled, finish initial forming, '1' to '2'
-                        g_it = robots[i].group_id
-                        if g_it in s_form_done.keys():
-                            s_form_done[g_it].append(i)
-                        else:
-                            s_form_done[g_it] = [i]
-                elif robots[i].status_1_sub == 1:
-                    # host robot is in the merging phase
-                    # check if the merging robot reaches the destination
-                    vect_temp = (robots[i].status_1_1_des[0] - robots[i].pos[0],
-                                 robots[i].status_1_1_des[1] - robots[i].pos[1])
-                    dist_temp = math.sqrt(vect_temp[0]*vect_temp[0] +
-                                          vect_temp[1]*vect_temp[1])
-                    if dist_temp < space_err:
-                        # status transition scheduled, finish merging, '1' to '2'
-                        s_merge_done.append(i)
-            # for the host robot having status of '2'
-            elif robots[i].status == 2:
-                # check if all key neighbors are still in range
-                neighbors_secured = True
-                for j in robots[i].key_neighbors:
-                    if j == -1: continue  # robots at two ends have only one key neighbor
-                    if j not in index_list[i]:
-                        neighbors_secured = False
-                        break
-                if neighbors_secured == False:
-                    # status transition scheduled, robot '2' gets lost, disassemble the group
-                    s_line_lost.append(robots[i].group_id)
+    # check 'robots' for any status change, schedule them for processing in next step
+    for i in range(robot_quantity):
+        # for the host robot having status of '0'
+        if robots[i].status == 0:
+            # check if this robot has valid neighbors at all
+            if len(index_list[i]) == 0: continue  # skip the neighbor check
+            # neighbors with status '2' and '1', in order of increasing distance
+            index_list_2 = [j for j in index_list[i] if robot_statuses[j] == 2]
+            index_list_1 = [j for j in index_list[i] if robot_statuses[j] == 1]
+            # process neighbors with status '2', highest priority
+            if len(index_list_2) != 0:
+                # check the group attribution of all the '2'
+                groups_temp = group_attribution(index_list_2, robot_group_ids)
+                # check if there are multiple groups detected from the '2'
+                if len(groups_temp) == 1:
+                    # there is only one group detected
+                    group_max = list(groups_temp.keys())[0]
                 else:
-                    # all the key neighbors are in goood position
-                    # disassemble check, for all the '1' and '2'
-                    status_list_temp = status_list[i][:]
-                    index_list_temp = index_list[i][:]
-                    # pop out the '0' first
-                    while 0 in status_list_temp:
-                        index_temp = status_list_temp.index(0)
-                        status_list_temp.pop(index_temp)
-                        index_list_temp.pop(index_temp)
-                    # start the group attribution dictionary with first robot
-                    if len(index_list_temp) > 0:
-                        groups_temp = {robots[index_list_temp[0]].group_id: [index_list_temp[0]]}
-                        for j in index_list_temp[1:]:
-                            current_group = robots[j].group_id
-                            if current_group in groups_temp.keys():
-                                groups_temp[current_group].append(j)
-                            else:
-                                groups_temp[current_group] = [j]
-                        # check if there are multiple groups detected
-                        if len(groups_temp.keys()) > 1:
-                            # status transition scheduled, to disassemble groups
-                            s_disassemble.append(groups_temp.keys())
-            # for the host robot having status of '-1'
-            elif robots[i].status == -1:
-                # check if life time expires, and get status back to '0'
-                if robots[i].status_n1_life < 0:
-                    s_back_0.append(i)
+                    # there is more than one group detected
+                    # it is designed that no disassembling trigger from robot '0'
+                    # compare which group has the most members in it
+                    member_max = 0  # start with 0 number of members in group
+                    group_max = 0  # corresponding group id with most members
+                    for j in groups_temp.keys():
+                        ## 'line_formation_1.py' did wrong in the following line
+                        # didn't fix it, not serious problem, program rarely goes here
+                        if groups[j][0] > member_max:
+                            member_max = groups[j][0]
+                            group_max = j
+                # search the closest '2' inside that group, among the ones that have
+                # at least one side available to be merged
+                robots_temp = np.array(groups_temp[group_max])
+                robots_temp = robots_temp[robot_mergeable[robots_temp]]
+                target_robot = -1  # the target robot to grab on
+                if len(robots_temp) != 0:
+                    target_robot = int(robots_temp[np.argmin(dist_table[i, robots_temp])])
+                # check if target robot has been located, prepare to grab on it
+                if target_robot != -1:
+                    # the target robot should have at least one spot availbe to be merged
+                    s_grab_on[i] = target_robot
+            # process neighbors with status '1', second priority
+            elif len(index_list_1) != 0:
+                # find the closest '1' and get bounced away by it
+                # still no trigger for disassembling if multiple groups exist in the '1's
+                robot_min = index_list_1[0]  # the list is sorted, first one is the closest
+                # get bounced away from this robot, update the moving direction
+                vect_x = robots[i].pos[0] - robots[robot_min].pos[0]
+                vect_y = robots[i].pos[1] - robots[robot_min].pos[1]
+                # orientation is pointing from robot_min to host
+                robots[i].ori = atan2(vect_y, vect_x)
+            # process neighbors with status '0', least priority
+            else:
+                # establish a list of all '0', in order of increasing distance
+                # to be checked later if grouping is possible and no conflict
+                # this list should be only '0's, already sorted
+                target_list = index_list[i][:]
+                # status transition scheduled, '0' forming initial group with '0'
+                s_init_form[i] = target_list[:]
+        # for the host robot having status of '1'
+        elif robots[i].status == 1:
+            # status of '1' needs to be checked and maintained constantly
+            # 1.check if the important group neighbors are still in range (skiped)
+            # one of key neighbors of robot '1' may appears later when merging,
+            # and key_neighbor variable may has -1 value representing empty
+            # 2.disassemble check, get group attribution of all '1' and '2'
+            # leave out the '0' in one pass, keeping the order of distance
+            index_list_temp = [j for j in index_list[i] if robot_statuses[j] != 0]
+            groups_temp = group_attribution(index_list_temp, robot_group_ids)
+            # check if there are multiple groups detected
+            if len(groups_temp) > 1:
+                # status transition scheduled, to disassemble groups
+                s_disassemble.append(list(groups_temp))
+                # may produce duplicates in s_disassemble, not serious problem
+            # 3.check if any status transition needs to be done
+            if robots[i].status_1_sub == 0:
+                # host robot is in the initial forming phase
+                # check if the neighbor robot is in appropriate distance
+                if abs(dist_table[i, robots[i].key_neighbors[0]] -
+                       line_space) < space_err:
+                    # status transition scheduled, finish initial forming, '1' to '2'
+                    g_it = robots[i].group_id
+                    if g_it in s_form_done.keys():
+                        s_form_done[g_it].append(i)
+                    else:
+                        s_form_done[g_it] = [i]
+            elif robots[i].status_1_sub == 1:
+                # host robot is in the merging phase
+                # check if the merging robot reaches the destination
+                vect_x = robots[i].status_1_1_des[0] - robots[i].pos[0]
+                vect_y = robots[i].status_1_1_des[1] - robots[i].pos[1]
+                if vect_x*vect_x + vect_y*vect_y < space_err*space_err:
+                    # status transition scheduled, finish merging, '1' to '2'
+                    s_merge_done.append(i)
+        # for the host robot having status of '2'
+        elif robots[i].status == 2:
+            # check if all key neighbors are still in range
+            neighbors_secured = True
+            for j in robots[i].key_neighbors:
+                if j == -1: continue  # robots at two ends have only one key neighbor
+                if j not in index_list[i]:
+                    neighbors_secured = False
+                    break
+            if neighbors_secured == False:
+                # status transition scheduled, robot '2' gets lost, disassemble the group
+                s_line_lost.append(robots[i].group_id)
+            else:
+                # all the key neighbors are in goood position
+                # disassemble check, for all the '1' and '2'
+                # leave out the '0' in one pass, keeping the order of distance
+                index_list_temp = [j for j in index_list[i] if robot_statuses[j] != 0]
+                groups_temp = group_attribution(index_list_temp, robot_group_ids)
+                # check if there are multiple groups detected
+                if len(groups_temp) > 1:
+                    # status transition scheduled, to disassemble groups
+                    s_disassemble.append(list(groups_temp))
+        # for the host robot having status of '-1'
+        elif robots[i].status == -1:
+            # check if life time expires, and get status back to '0'
+            if robots[i].status_n1_life < 0:
+                s_back_0.append(i)
 
-        # check 'groups' for any status change
-        for g_it in groups.keys():
-            if groups[g_it][4]: continue  # already becoming dominant
-            if groups[g_it][0] > robot_quantity/2:
-                # the group has more than half the totoal number of robots
-                groups[g_it][4] = True  # becoming dominant
-                groups[g_it][1] = 100.0  # a large number
-            if groups[g_it][1] < 0:  # life time of a group expires
-                # schedule operation to disassemble this group
-                s_group_exp.append(g_it)
+    # check 'groups' for any status change
+    for g_it in groups.keys():
+        if groups[g_it][4]: continue  # already becoming dominant
+        if groups[g_it][0] > robot_quantity/2:
+            # the group has more than half the totoal number of robots
+            groups[g_it][4] = True  # becoming dominant
+            groups[g_it][1] = 100.0  # a large number
+        if groups[g_it][1] < 0:  # life time of a group expires
+            # schedule operation to disassemble this group
+            s_group_exp.append(g_it)
 
-        # process the scheduled status change, in the order of the priority
-        # 1.s_grab_on, robot '0' grabs on robot '2', becoming '1'
-        # (this part of code is kind of redundant, needs to make it nicer)
-        for i in s_grab_on.keys():
-            it0 = s_grab_on[i]  # 'it0' is the robot that robot 'i' tries to grab on
-            # discuss the merging availability of robot 'it0'
-            g_it = robots[it0].group_id  # group id of 'it0'
-            # it0 was available when added to s_grab_on, but check again if occupied by others
-            # merge availability of smaller index side
-            side0_avail = robots[it0].status_2_avail1[0] & robots[it0].status_2_avail2[0]
-            side0_des = [-1,-1]  # destination if merging at small index end
-            side0_hang = False  # indicate if destination at side 0 is hanging
-            side0_next = -1  # next key neighbor expected to meet at this side
-            if side0_avail:
-                # calculate the merging destination
-                # if this side is beyond two ends of the line, it can only be the small end
-                if robots[it0].status_2_sequence == 0:
-                    # the grab on robot is the robot of index 0 on the line
-                    # get its only neighbor to calculate the line direction
-                    it1 = robots[it0].key_neighbors[1]  # second robot on the line
-                    vect_temp = (robots[it0].pos[0] - robots[it1].pos[0],
-                                 robots[it0].pos[1] - robots[it1].pos[1])  # from it1 to it0
-                    ori_temp = math.atan2(vect_temp[1], vect_temp[0])
-                    side0_des = [robots[it0].pos[0] + line_space*math.cos(ori_temp),
-                                 robots[it0].pos[1] + line_space*math.sin(ori_temp)]
-                    side0_hang = True
-                else:
-                    # the grab on robot is not at the start of the line
-                    # get its smaller index neighbor
-                    it1 = robots[it0].key_neighbors[0]
-                    side0_next = it1
-                    # the destination is the middle position of it0 and it1
-                    side0_des = [(robots[it0].pos[0]+robots[it1].pos[0])/2,
-                                 (robots[it0].pos[1]+robots[it1].pos[1])/2]
-            # merge availability of larger index side
-            side1_avail = robots[it0].status_2_avail1[1] & robots[it0].status_2_avail2[1]
-            side1_des = [-1,-1]
-            side1_hang = False  # indicate if destination at side 1 is hanging
-            side1_next = -1  # next key neighbor expected to meet at this side
-            if side1_avail:
-                # calculate the merging destination
-                # if this side is beyond two ends of the line, it can only the large end
-                if robots[it0].status_2_end:
-                    # the grab on robot is at the larger index end
-                    # get its only neighbor to calculate the line direction
-                    it1 = robots[it0].key_neighbors[0]  # the inverse second on the line
-                    vect_temp = (robots[it0].pos[0] - robots[it1].pos[0],
-                                 robots[it0].pos[1] - robots[it1].pos[1])  # from it1 to it0
-                    ori_temp = math.atan2(vect_temp[1], vect_temp[0])
-                    side1_des = [robots[it0].pos[0] + line_space*math.cos(ori_temp),
-                                 robots[it0].pos[1] + line_space*math.sin(ori_temp)]
-                    side1_hang = True
-                else:
-                    # the grab on robot is not at the larger index end
-                    # get its larger index neighbor
-                    it1 = robots[it0].key_neighbors[1]
-                    side1_next = it1
-                    # the destination is the middle position of it0 and it1
-                    side1_des = [(robots[it0].pos[0]+robots[it1].pos[0])/2,
-                                 (robots[it0].pos[1]+robots[it1].pos[1])/2]
-            # check if there is at least one side is available
-            if side0_avail or side1_avail:
-                # perform operations regardless of which side to merge
-                robots[i].status = 1  # status becoming '1'
-                robots[i].group_id = g_it  # assign the group id
-                robots[i].status_1_sub = 1
-                robots[i].key_neighbors = [-1, -1]  # initialize with '-1's
-                groups[g_it][0] = groups[g_it][0] + 1  # increase the group size by 1
-                groups[g_it][1] = groups[g_it][1] + life_incre # increase life time
-                groups[g_it][3].append(i)
-                # deciding which side to merge
-                side_decision = -1  # 0 for left, 1 for right
-                if side0_avail and side1_avail:
-                    # both sides are available, calculate the distance and compare
-                    vect_temp = (side0_des[0]-robots[i].pos[0], side0_des[1]-robots[i].pos[1])
-                    side0_dist = math.sqrt(vect_temp[0]*vect_temp[0] +
-                                           vect_temp[1]*vect_temp[1])
-                    vect_temp = (side1_des[0]-robots[i].pos[0], side1_des[1]-robots[i].pos[1])
-                    side1_dist = math.sqrt(vect_temp[0]*vect_temp[0] +
-                                           vect_temp[1]*vect_temp[1])
-                    if side0_dist < side1_dist:
-                        side_decision = 0
-                    else:
-                        side_decision = 1
-                elif side0_avail and (not side1_avail):
-                    # only small index side is available, choose this side
+    # process the scheduled status change, in the order of the priority
+    # 1.s_grab_on, robot '0' grabs on robot '2', becoming '1'
+    # (this part of code is kind of redundant, needs to make it nicer)
+    for i in s_grab_on.keys():
+        it0 = s_grab_on[i]  # 'it0' is the robot that robot 'i' tries to grab on
+        # discuss the merging availability of robot 'it0'
+        g_it = robots[it0].group_id  # group id of 'it0'
+        # it0 was available when added to s_grab_on, but check again if occupied by others
+        # merge availability of smaller index side
+        side0_avail = robots[it0].status_2_avail1[0] & robots[it0].status_2_avail2[0]
+        side0_des = [-1,-1]  # destination if merging at small index end
+        side0_hang = False  # indicate if destination at side 0 is hanging
+        side0_next = -1  # next key neighbor expected to meet at this side
+        if side0_avail:
+            # calculate the merging destination
+            # if this side is beyond two ends of the line, it can only be the small end
+            if robots[it0].status_2_sequence == 0:
+                # the grab on robot is the robot of index 0 on the line
+                # get its only neighbor to calculate the line direction
+                it1 = robots[it0].key_neighbors[1]  # second robot on the line
+                side0_des = line_extension(robots[it0].pos, robots[it1].pos)
+                side0_hang = True
+            else:
+                # the grab on robot is not at the start of the line
+                # get its smaller index neighbor
+                it1 = robots[it0].key_neighbors[0]
+                side0_next = it1
+                # the destination is the middle position of it0 and it1
+                side0_des = [(robots[it0].pos[0]+robots[it1].pos[0])/2,
+                             (robots[it0].pos[1]+robots[it1].pos[1])/2]
+        # merge availability of larger index side
+        side1_avail = robots[it0].status_2_avail1[1] & robots[it0].status_2_avail2[1]
+        side1_des = [-1,-1]
+        side1_hang = False  # indicate if destination at side 1 is hanging
+        side1_next = -1  # next key neighbor expected to meet at this side
+        if side1_avail:
+            # calculate the merging destination
+            # if this side is beyond two ends of the line, it can only the large end
+            if robots[it0].status_2_end:
+                # the grab on robot is at the larger index end
+                # get its only neighbor to calculate the line direction
+                it1 = robots[it0].key_neighbors[0]  # the inverse second on the line
+                side1_des = line_extension(robots[it0].pos, robots[it1].pos)
+                side1_hang = True
+            else:
+                # the grab on robot is not at the larger index end
+                # get its larger index neighbor
+                it1 = robots[it0].key_neighbors[1]
+                side1_next = it1
+                # the destination is the middle position of it0 and it1
+                side1_des = [(robots[it0].pos[0]+robots[it1].pos[0])/2,
+                             (robots[it0].pos[1]+robots[it1].pos[1])/2]
+        # check if there is at least one side is available
+        if side0_avail or side1_avail:
+            # perform operations regardless of which side to merge
+            robots[i].status = 1  # status becoming '1'
+            robots[i].group_id = g_it  # assign the group id
+            robots[i].status_1_sub = 1
+            robots[i].key_neighbors = [-1, -1]  # initialize with '-1's
+            groups[g_it][0] = groups[g_it][0] + 1  # increase the group size by 1
+            groups[g_it][1] = groups[g_it][1] + life_incre # increase life time
+            groups[g_it][3].append(i)
+            # deciding which side to merge
+            side_decision = -1  # 0 for left, 1 for right
+            if side0_avail and side1_avail:
+                # both sides are available, calculate the distance and compare
+                # (squared distances, same order as the distances)
+                vect_x = side0_des[0]-robots[i].pos[0]
+                vect_y = side0_des[1]-robots[i].pos[1]
+                side0_dist_sq = vect_x*vect_x + vect_y*vect_y
+                vect_x = side1_des[0]-robots[i].pos[0]
+                vect_y = side1_des[1]-robots[i].pos[1]
+                side1_dist_sq = vect_x*vect_x + vect_y*vect_y
+                if side0_dist_sq < side1_dist_sq:
                     side_decision = 0
-                elif side1_avail and (not side0_avail):
-                    # only large index side is available, choose this side
-                    side_decision = 1
-                # perform operations according the side decision
-                if side_decision == 0:
-                    # operations of taking small index side
-                    robots[i].key_neighbors[1] = it0  # has key neighbor at large index side
-                    robots[i].status_1_1_des = side0_des
-                    vect_temp = (side0_des[0]-robots[i].pos[0], side0_des[1]-robots[i].pos[1])
-                    robots[i].ori = math.atan2(vect_temp[1], vect_temp[0])
-                    robots[it0].status_2_avail2[0] = False  # reverse flag for small side
-                    # robot 'it0' does not take 'i' as key nieghbor, only robots on the line
-                    if not side0_hang:
-                        it1 = side0_next
-                        robots[i].key_neighbors[0] = it1
-                        robots[it1].status_2_avail2[1] = False
-                else:
-                    # operations of taking large index side
-                    robots[i].key_neighbors[0] = it0  # has key neighbor at small index side
-                    robots[i].status_1_1_des = side1_des
-                    vect_temp = (side1_des[0]-robots[i].pos[0], side1_des[1]-robots[i].pos[1])
-                    robots[i].ori = math.atan2(vect_temp[1], vect_temp[0])
-                    robots[it0].status_2_avail2[1] = False  # reverse flag for large side
-                    if not side1_hang:
-                        it1 = side1_next
-                        robots[i].key_neighbors[1] = it1
-                        robots[it1].status_2_avail2[0] = False
-        # 2.s_init_form, robot '0' initial forms with another '0', becoming '1'
-        s_pair = []  # the container for finalized initial forming pairs
-        while len(s_init_form.keys()) != 0:  # there are still robots to be processed
-            for i in s_init_form.keys():
-                it = s_init_form[i][0]  # index temp
-                if it in s_init_form.keys():
-                    if s_init_form[it][0] == i:  # robot 'it' also recognizes 'i' as closest
-                        s_pair.append([i, it])
-                        s_init_form.pop(i)  # pop out both 'i' and 'it'
-                        s_init_form.pop(it)
-                        break
-                    elif i not in s_init_form[it]:
-                        # usually should not be here unless robots have different sensing range
-                        s_init_form[i].remove(it)
-                        if len(s_init_form[i]) == 0:
-                            s_init_form.pop(i)
-                        break
-                    # have not considered the situation that 'i' in 'it' but not first one
                 else:
-                    # will be here if robot 'it' chooses to be bounced away by '1', or grab on '2'
-                    s_init_form[i].remove(it)
-                    if len(s_init_form[i]) == 0:
-                        s_init_form.pop(i)
-                    break
-        # process the finalized pairs
-        for pair in s_pair:
-            it0 = pair[0]  # get indices of the pair
-            it1 = pair[1]
-            g_it = random.randint(0, group_id_upper_limit)
-            while g_it in groups.keys():  # keep generate until not duplicate
-                g_it = random.randint(0, group_id_upper_limit)
+                    side_decision = 1
+            elif side0_avail and (not side1_avail):
+                # only small index side is available, choose this side
+                side_decision = 0
+            elif side1_avail and (not side0_avail):
+                # only large index side is available, choose this side
+                side_decision = 1
+            # perform operations according the side decision
+            if side_decision == 0:
+                # operations of taking small index side
+                robots[i].key_neighbors[1] = it0  # has key neighbor at large index side
+                robots[i].status_1_1_des = side0_des
+                vect_x = side0_des[0]-robots[i].pos[0]
+                vect_y = side0_des[1]-robots[i].pos[1]
+                robots[i].ori = atan2(vect_y, vect_x)
+                robots[it0].status_2_avail2[0] = False  # reverse flag for small side
+                # robot 'it0' does not take 'i' as key nieghbor, only robots on the line
+                if not side0_hang:
+                    it1 = side0_next
+                    robots[i].key_neighbors[0] = it1
+                    robots[it1].status_2_avail2[1] = False
+            else:
+                # operations of taking large index side
+                robots[i].key_neighbors[0] = it0  # has key neighbor at small index side
+                robots[i].status_1_1_des = side1_des
+                vect_x = side1_des[0]-robots[i].pos[0]
+                vect_y = side1_des[1]-robots[i].pos[1]
+                robots[i].ori = atan2(vect_y, vect_x)
+                robots[it0].status_2_avail2[1] = False  # reverse flag for large side
+                if not side1_hang:
+                    it1 = side1_next
+                    robots[i].key_neighbors[1] = it1
+                    robots[it1].status_2_avail2[0] = False
+    # 2.s_init_form, robot '0' initial forms with another '0', becoming '1'
+    s_pair = []  # the container for finalized initial forming pairs
+    while len(s_init_form) != 0:  # there are still robots to be processed
+        s_changed = False  # whether this pass paired or dropped anything
+        # pair up all robots that recognize each other as closest in one pass
+        for i in list(s_init_form.keys()):
+            if i not in s_init_form: continue  # already paired in this pass
+            it = s_init_form[i][0]  # index temp
+            if it in s_init_form and s_init_form[it][0] == i:
+                s_pair.append([i, it])
+                s_init_form.pop(i)  # pop out both 'i' and 'it'
+                s_init_form.pop(it)
+                s_changed = True
+        # the remaining robots give up the closest one if it is no longer available
+        for i in list(s_init_form.keys()):
+            if i not in s_init_form: continue  # popped in this pass
+            it = s_init_form[i][0]
+            # robot 'it' is gone if paired, bounced away by '1', or grabbing on '2'
+            # 'i' not in the list of 'it' usually should not happen, unless robots
+            # have different sensing range
+            if it not in s_init_form or i not in s_init_form[it]:
+                s_init_form[i].pop(0)  # 'it' is the first one, pop by index
+                if len(s_init_form[i]) == 0:
+                    s_init_form.pop(i)
+                s_changed = True
+            # have not considered the situation that 'i' in 'it' but not first one
+        if not s_changed: break  # only waiting robots left, none can be paired
+    # process the finalized pairs
+    for pair in s_pair:
+        it0 = pair[0]  # get indices of the pair
+        it1 = pair[1]
+        g_it = next_group_id  # ids are never reused, so no duplicate check
+        next_group_id = next_group_id + 1
+        # update the 'robots' variable
+        robots[it0].status = 1
+        robots[it1].status = 1
+        robots[it0].group_id = g_it
+        robots[it1].group_id = g_it
+        robots[it0].status_1_sub = 0  # sub status '0' for initial forming
+        robots[it1].status_1_sub = 0
+        robots[it0].key_neighbors = [it1, -1]  # name the other as the key neighbor
+        robots[it1].key_neighbors = [it0, -1]
+        # update the 'groups' variable
+        groups[g_it] = [2, 2*life_incre, [], [it0, it1], False]  # add new entry
+        # deciding moving direction for the initial forming robots
+        vect_x = robots[it1].pos[0]-robots[it0].pos[0]  # pointing from it0 to it1
+        vect_y = robots[it1].pos[1]-robots[it0].pos[1]
+        ori_temp = atan2(vect_y, vect_x)
+        if dist_table[it0, it1] > line_space:  # equally dist_table[it1, it0]
+            # attracting each other, most likely this happens
+            robots[it0].ori = ori_temp
+            robots[it1].ori = reset_radian(ori_temp + pi)
+        else:
+            # repelling each other
+            robots[it0].ori = reset_radian(ori_temp + pi)
+            robots[it1].ori = ori_temp
+        # no need to check if they are already within the space error of line space
+        # this will be done in the next round of status change check
+    # 3.s_form_done, robot '1' finishes initial forming, becoming '2'
+    for g_it in s_form_done.keys():
+        if len(s_form_done[g_it]) == 2:  # double check, both robots agree forming is done
+            it0 = s_form_done[g_it][0]
+            it1 = s_form_done[g_it][1]
+            # update 'robots' variable for 'it0' and 'it1'
+            robots[it0].status = 2
+            robots[it1].status = 2
+            # randomly deciding which is begining and end of the line, random choice
+            if random.random() > 0.5:  # half chance
+                # swap 'ito' and 'it1', 'it0' as begining, 'it1' as end
+                temp = it0
+                it0 = it1
+                it1 = temp
             # update the 'robots' variable
-            robots[it0].status = 1
-            robots[it1].status = 1
-            robots[it0].group_id = g_it
-            robots[it1].group_id = g_it
-            robots[it0].status_1_sub = 0  # sub status '0' for initial forming
-            robots[it1].status_1_sub = 0
-            robots[it0].key_neighbors = [it1]  # name the other as the key neighbor
-            robots[it1].key_neighbors = [it0]
+            robots[it0].vel = 0  # give 0 speed temporarily
+            robots[it1].vel = 0
+            robots[it0].status_2_sequence = 0
+            robots[it1].status_2_sequence = 1
+            robots[it0].status_2_end = False
+            robots[it1].status_2_end = True
+            robots[it0].status_2_avail2 = [True, True]  # both sides are available
+            robots[it1].status_2_avail2 = [True, True]
+            robots[it0].key_neighbors = [-1, it1]  # one side has not key neighbor
+            robots[it1].key_neighbors = [it0, -1]
             # update the 'groups' variable
-            groups[g_it] = [2, 2*life_incre, [], [it0, it1], False]  # add new entry
-            # deciding moving direction for the initial forming robots
-            vect_temp = (robots[it1].pos[0]-robots[it0].pos[0],
-                         robots[it1].pos[1]-robots[it0].pos[1])  # pointing from it0 to it1
-            ori_temp = math.atan2(vect_temp[1], vect_temp[0])
-            if dist_table[it0][it1] > line_space:  # equally dist_table[it1][it0]
-                # attracting each other, most likely this happens
-                robots[it0].ori = ori_temp
-                robots[it1].ori = reset_radian(ori_temp + math.pi)
+            g_it = robots[it0].group_id
+            groups[g_it][2] = [it0, it1]  # add the robots for the line
+            groups[g_it][3] = []  # empty the forming & merging pool
+    # 4.s_merge_done, robot '1' finishes merging, becoming '2'
+    for i in s_merge_done:
+        # finding which side to merge
+        merge_check = -1
+            # '0' for merging at small index end of the line
+            # '1' for merging between two neighbors
+            # '2' for merging at large index end of the line
+        if robots[i].key_neighbors[0] == -1:
+            # only small index neighbor is empty
+            # large index side neighbor is at small index end of the line
+            merge_check = 0
+        else:
+            if robots[i].key_neighbors[1] == -1:
+                # only large index neighbor is empty
+                # small index side neighbor is at large index end of the line
+                merge_check = 2
             else:
-                # repelling each other
-                robots[it0].ori = reset_radian(ori_temp + math.pi)
-                robots[it1].ori = ori_temp
-            # no need to check if they are already within the space error of line space
-            # this will be done in the next round of status change check
-        # 3.s_form_done, robot '1' finishes initial forming, becoming '2'
-        for g_it in s_form_done.keys():
-            if len(s_form_done[g_it]) == 2:  # double check, both robots agree forming is done
-                it0 = s_form_done[g_it][0]
-                it1 = s_form_done[g_it][1]
-                # update 'robots' variable for 'it0' and 'it1'
-                robots[it0].status = 2
-                robots[it1].status = 2
-                # randomly deciding which is begining and end of the line, random choice
-                if random.random() > 0.5:  # half chance
-                    # swap 'ito' and 'it1', 'it0' as begining, 'it1' as end
-                    temp = it0
-                    it0 = it1
-                    it1 = temp
-                # update the 'robots' variable
-                robots[it0].vel = 0  # give 0 speed temporarily
-                robots[it1].vel = 0
-                robots[it0].status_2_sequence = 0
-                robots[it1].status_2_sequence = 1
-                robots[it0].status_2_end = False
-                robots[it1].status_2_end = True
-                robots[it0].status_2_avail2 = [True, True]  # both sides are available
-                robots[it1].status_2_avail2 = [True, True]
-                robots[it0].key_neighbors = [-1, it1]  # one side has not key neighbor
-                robots[it1].key_neighbors = [it0, -1]
-                # update the 'groups' variable
-                g_it = robots[it0].group_id
-                groups[g_it][2] = [it0, it1]  # add the robots for the line
-                groups[g_it][3] = []  # empty the forming & merging pool
-        # 4.s_merge_done, robot '1' finishes merging, becoming '2'
-        for i in s_merge_done:
-            # finding which side to merge
-            merge_check = -1
-                # '0' for merging at small index end of the line
-                # '1' for merging between two neighbors
-                # '2' for merging at large index end of the line
-            if robots[i].key_neighbors[0] == -1:
-                # only small index neighbor is empty
-                # large index side neighbor is at small index end of the line
-                merge_check = 0
-            else:
-                if robots[i].key_neighbors[1] == -1:
-                    # only large index neighbor is empty
-                    # small index side neighbor is at large index end of the line
-                    merge_check = 2
-                else:
-                    # both neighbors are present, merge in between
-                    merge_check = 1
-            # perform the merge operations
-            robots[i].status = 2
-            robots[i].vel = 0  # give 0 speed temporarily
-            robots[i].status_2_avail2 = [True, True]  # both sides have no merging robot
-            # no need to change key neighbors of robot 'i'
-            g_it = robots[i].group_id
-            groups[g_it][3].remove(i)  # remove from the merging pool
-            if merge_check == 0:  # merge into small index end of the line
-                it0 = robots[i].key_neighbors[1]  # the old small index end
-                robots[i].status_2_sequence = 0
-                robots[i].status_2_end = False
-                groups[g_it][2].insert(0, i)  # insert robot 'i' as first one
-                # shift sequence of robots starting from the second one
-                for j in groups[g_it][2][1:]:
-                    robots[j].status_2_sequence = robots[j].status_2_sequence + 1
-                # update attributes of the second robot on the line
-                robots[it0].status_2_avail2[0] = True  # becomes available again
-                robots[it0].key_neighbors[0] = i  # add key neighbor at small index side
-            elif merge_check == 2:  # merge into large index end of the line
-                it0 = robots[i].key_neighbors[0]  # the old large index end
-                robots[i].status_2_sequence = robots[it0].status_2_sequence + 1
-                # no need to shift sequence of other robots on the line
-                robots[i].status_2_end = True
-                robots[it0].status_2_end = False  # no longer the end of the line
-                robots[it0].status_2_avail2[1] = True
-                robots[it0].key_neighbors[1] = i  # add key neighbor at large index side
-                groups[g_it][2].append(i)  # append at the end of the list
-            elif merge_check == 1:  # merge in the middle of two robots
-                # it0 is in small sequence, it1 is in large sequence
+                # both neighbors are present, merge in between
+                merge_check = 1
+        # perform the merge operations
+        robots[i].status = 2
+        robots[i].vel = 0  # give 0 speed temporarily
+        robots[i].status_2_avail2 = [True, True]  # both sides have no merging robot
+        # no need to change key neighbors of robot 'i'
+        g_it = robots[i].group_id
+        groups[g_it][3].remove(i)  # remove from the merging pool
+        if merge_check == 0:  # merge into small index end of the line
+            it0 = robots[i].key_neighbors[1]  # the old small index end
+            robots[i].status_2_sequence = 0
+            robots[i].status_2_end = False
+            groups[g_it][2].insert(0, i)  # insert robot 'i' as first one
+            # shift sequence of robots starting from the second one
+            for j in groups[g_it][2][1:]:
+                robots[j].status_2_sequence = robots[j].status_2_sequence + 1
+            # update attributes of the second robot on the line
+            robots[it0].status_2_avail2[0] = True  # becomes available again
+            robots[it0].key_neighbors[0] = i  # add key neighbor at small index side
+        elif merge_check == 2:  # merge into large index end of the line
+            it0 = robots[i].key_neighbors[0]  # the old large index end
+            robots[i].status_2_sequence = robots[it0].status_2_sequence + 1
+            # no need to shift sequence of other robots on the line
+            robots[i].status_2_end = True
+            robots[it0].status_2_end = False  # no longer the end of the line
+            robots[it0].status_2_avail2[1] = True
+            robots[it0].key_neighbors[1] = i  # add key neighbor at large index side
+            groups[g_it][2].append(i)  # append at the end of the list
+        elif merge_check == 1:  # merge in the middle of two robots
+            # it0 is in small sequence, it1 is in large sequence
+            it0 = robots[i].key_neighbors[0]
+            it1 = robots[i].key_neighbors[1]
+            seq_new = robots[it1].status_2_sequence  # 'i' will replace seq of 'it1'
+            robots[i].status_2_sequence = seq_new
+            robots[i].status_2_end = False
+            groups[g_it][2].insert(seq_new, i)
+            # shift sequence of robots starting form 'it1'
+            for j in groups[g_it][2][seq_new+1:]:
+                robots[j].status_2_sequence = robots[j].status_2_sequence + 1
+            # update attribution of it0 and it1
+            robots[it0].status_2_avail2[1] = True  # large side of small index robot
+            robots[it0].key_neighbors[1] = i  # replace with new member
+            robots[it1].status_2_avail2[0] = True  # similar for large index robot
+            robots[it1].key_neighbors[0] = i
+    # # 5.s_form_lost, robot '1' gets lost during initial forming
+    # for g_it in s_form_lost:
+    #     # disassemble the group together in s_disassemble
+    #     s_disassemble.append([g_it])
+    # # 6.s_merge_lost, robot '1' gets lost during merging, becoming '-1'
+    # for i in s_merge_lost:
+    #     robots[i].status = -1
+    #     robots[i].vel = const_vel  # restore the faster speed
+    #     robots[i].ori = random.random() * 2*math.pi - math.pi
+    #     robots[i].status_n1_life = random.randint(n1_life_lower, n1_life_upper)
+    #     # update the key neighbors' status
+    #     if robots[i].key_neighbors[0] != -1:
+    #         # robot 'i' has a small index side key neighbor
+    #         it0 = robots[i].key_neighbors[0]
+    #         robots[it0].status_2_avail2[1] = True
+    #     if robots[i].key_neighbors[1] != -1:
+    #         # robot 'i' has a large index side key neighbor
+    #         it1 = robots[i].key_neighbors[1]
+    #         robots[it1].status_2_avail2[0] = True
+    #     g_it = robots[i].group_id
+    #     groups[g_it][0] = groups[g_it][0] - 1  # decrease group size by 1
+    #     # do not decrease group's life time due to member lost
+    #     groups[g_it][3].remove(i)
+    # 7.s_line_lost, robot '2' gets lost during adjusting on the line
+    for g_it in s_line_lost:
+        # disassemble the group together in s_disassemble
+        s_disassemble.append([g_it])
+    # 8.s_group_exp, natural life expiration of the groups
+    for g_it in s_group_exp:
+        s_disassemble.append([g_it])  # leave the work to s_disassemble
+    # 9.s_disassemble, mostly triggered by robot '1' or '2'
+    s_dis_list = []  # list of groups that have been finalized for disassembling
+    s_dis_append = s_dis_list.append
+    # compare number of members to decide which groups to disassemble
+    for gs_it in s_disassemble:
+        if len(gs_it) == 1:
+            # disassemble trigger from other sources
+            if gs_it[0] not in s_dis_list:
+                s_dis_append(gs_it[0])
+        else:
+            # compare which group has the most members, and disassemble the rest
+            g_temp = gs_it[:]
+            member_max = 0  # number of members in the group
+            group_max = -1  # corresponding group id with most members
+            for g_it in g_temp:
+                if groups[g_it][0] > member_max:
+                    member_max = groups[g_it][0]
+                    group_max = g_it
+            g_temp.remove(group_max)  # remove the group with the most members
+            for g_it in g_temp:
+                if g_it not in s_dis_list:
+                    s_dis_append(g_it)
+    # start disassembling
+    for g_it in s_dis_list:
+        # update the 'robots' variable
+        for i in groups[g_it][3]:  # for robots off the line
+            robot_temp = robots[i]
+            robot_temp.vel = const_vel  # restore the faster speed
+            robot_temp.status = -1
+            robot_temp.status_n1_life = random.randint(n1_life_lower, n1_life_upper)
+            robot_temp.ori = random.random() * 2*pi - pi
+        # same way of exploding the robots on the line
+        line_temp = groups[g_it][2]  # robots on the line, in order of sequence
+        oris_temp = line_explosion(line_temp, robots, robot_poses)
+        for i, ori_temp in zip(line_temp, oris_temp):  # for robots on the line
+            robots[i].vel = const_vel  # restore the faster speed
+            robots[i].status = -1
+            robots[i].status_n1_life = random.randint(n1_life_lower, n1_life_upper)
+            robots[i].ori = ori_temp
+        # pop out this group from 'groups'
+        groups.pop(g_it)
+    # 10.s_back_0, life time of robot '-1' expires, becoming '0'
+    for i in s_back_0:
+        # still maintaining the old moving direction and velocity
+        robots[i].status = 0
+
+    # update the physics(pos, vel and ori), first the wall bouncing
+    # check if out of boundaries, same algorithm from previous line formation program
+    # change only direction of velocity, for all robots at once
+    robot_oris = np.array([robot.ori for robot in robots])
+    oris_cos = np.cos(robot_oris)
+    # out of right boundary with velocity on x pointing right, or the same for left
+    bounce_x = (((robot_poses[:,0] >= world_size[0]) & (oris_cos > 0)) |
+                ((robot_poses[:,0] <= 0) & (oris_cos < 0)))
+    robot_oris = np.where(bounce_x, reset_radians(pi - robot_oris), robot_oris)
+    oris_sin = np.sin(robot_oris)
+    # out of top boundary with velocity on y pointing up, or the same for bottom
+    bounce_y = (((robot_poses[:,1] >= world_size[1]) & (oris_sin > 0)) |
+                ((robot_poses[:,1] <= 0) & (oris_sin < 0)))
+    robot_oris = np.where(bounce_y, reset_radians(-robot_oris), robot_oris)
+    for i in np.flatnonzero(bounce_x | bounce_y).tolist():
+        robots[i].ori = robot_oris[i]
+    # update one step of distance for all robots at once, in place of the position array
+    travel_dists = np.array([robot.vel for robot in robots]) * frame_dt
+    robot_poses[:,0] += travel_dists*np.cos(robot_oris)
+    robot_poses[:,1] += travel_dists*np.sin(robot_oris)
+    # update the control of robot '1' and '2' from the new positions, life decrese of '-1'
+    for i in range(robot_quantity):
+        # update moving direciton and destination of robot '1'
+        if robots[i].status == 1:
+            if robots[i].status_1_sub == 0:  # for the initial forming robots
                 it0 = robots[i].key_neighbors[0]
-                it1 = robots[i].key_neighbors[1]
-                seq_new = robots[it1].status_2_sequence  # 'i' will replace seq of 'it1'
-                robots[i].status_2_sequence = seq_new
-                robots[i].status_2_end = False
-                groups[g_it][2].insert(seq_new, i)
-                # shift sequence of robots starting form 'it1'
-                for j in groups[g_it][2][seq_new+1:]:
-                    robots[j].status_2_sequence = robots[j].status_2_sequence + 1
-                # update attribution of it0 and it1
-                robots[it0].status_2_avail2[1] = True  # large side of small index robot
-                robots[it0].key_neighbors[1] = i  # replace with new member
-                robots[it1].status_2_avail2[0] = True  # similar for large index robot
-                robots[it1].key_neighbors[0] = i
-        # # 5.s_form_lost, robot '1' gets lost during initial forming
-        # for g_it in s_form_lost:
-        #     # disassemble the group together in s_disassemble
-        #     s_disassemble.append[g_it]
-        # # 6.s_merge_lost, robot '1' gets lost during merging, becoming '-1'
-        # for i in s_merge_lost:
-        #     robots[i].status = -1
-        #     robots[i].vel = const_vel  # restore the faster speed
-        #     robots[i].ori = random.random() * 2*math.pi - math.pi
-        #     robots[i].status_n1_life = random.randint(n1_life_lower, n1_life_upper)
-        #     # update the key neighbors' status
-        #     if robots[i].key_neighbors[0] != -1:
-        #         # robot 'i' has a small index side key neighbor
-        #         it0 = robots[i].key_neighbors[0]
-        #         robots[it0].status_2_avail2[1] = True
-        #     if robots[i].key_neighbors[1] != -1:
-        #         # robot 'i' has a large index side key neighbor
-        #         it1 = robots[i].key_neighbors[1]
-        #         robots[it1].status_2_avail2[0] = True
-        #     g_it = robots[i].group_id
-        #     groups[g_it][0] = groups[g_it][0] - 1  # decrease group size by 1
-        #     # do not decrease group's life time due to member lost
-        #     groups[g_it][3].remove(i)
-        # 7.s_line_lost, robot '2' gets lost during adjusting on the line
-        for g_it in s_line_lost:
-            # disassemble the group together in s_disassemble
-            s_disassemble.append[g_it]
-        # 8.s_group_exp, natural life expiration of the groups
-        for g_it in s_group_exp:
-            s_disassemble.append([g_it])  # leave the work to s_disassemble
-        # 9.s_disassemble, mostly triggered by robot '1' or '2'
-        s_dis_list = []  # list of groups that have been finalized for disassembling
-        # compare number of members to decide which groups to disassemble
-        for gs_it in s_disassemble:
-            if len(gs_it) == 1:
-                # disassemble trigger from other sources
-                if gs_it[0] not in s_dis_list:
-                    s_dis_list.append(gs_it[0])
-            else:
-                # compare which group has the most members, and disassemble the rest
-                g_temp = list(gs_it)[:]
-                member_max = 0  # number of members in the group
-                group_max = -1  # corresponding group id with most members
-                for g_it in g_temp:
-                    if groups[g_it][0] > member_max:
-                        member_max = groups[g_it][0]
-                        group_max = g_it
-                g_temp.remove(group_max)  # remove the group with the most members
-                for g_it in g_temp:
-                    if g_it not in s_dis_list:
-                        s_dis_list.append(g_it)
-        # start disassembling
-        for g_it in s_dis_list:
-            # update the 'robots' variable
-            for i in groups[g_it][3]:  # for robots off the line
-                robots[i].vel = const_vel  # restore the faster speed
-                robots[i].status = -1
-                robots[i].status_n1_life = random.randint(n1_life_lower, n1_life_upper)
-                robots[i].ori = random.random() * 2*math.pi - math.pi
-            # same way of exploding the robots on the line
-            num_online = len(groups[g_it][2])  # number of robots on the line
-            num_1_half = num_online/2  # number of robots for the first half
-            num_2_half = num_online - num_1_half  # for the second half
-            for i in groups[g_it][2]:  # for robots on the line
-                robots[i].vel = const_vel  # restore the faster speed
-                robots[i].status = -1
-                robots[i].status_n1_life = random.randint(n1_life_lower, n1_life_upper)
-                ori_temp = 0  # orientation of the line, calculate individually
-                seq_temp = robots[i].status_2_sequence  # sequence on the line
-                if robots[i].status_2_sequence == 0:
-                    # then get second one on the line
-                    it0 = groups[robots[i].group_id][2][1]
-                    # orientation points to the small index end
-                    ori_temp = math.atan2(robots[i].pos[1]-robots[it0].pos[1],
-                                          robots[i].pos[0]-robots[it0].pos[0])
-                elif robots[i].status_2_end == True:
-                    # then get inverse second one on the line
-                    it0 = groups[robots[i].group_id][2][-2]
-                    # orientation points to the large index end
-                    ori_temp = math.atan2(robots[i].pos[1]-robots[it0].pos[1],
-                                          robots[i].pos[0]-robots[it0].pos[0])
+                vect_x = robots[it0].pos[0]-robots[i].pos[0]
+                vect_y = robots[it0].pos[1]-robots[i].pos[1]
+                ori_temp = atan2(vect_y, vect_x)
+                if dist_table[i, it0] > line_space:
+                    robots[i].ori = ori_temp
                 else:
-                    # get both neighbors
-                    it0 = groups[g_it][2][seq_temp - 1]
-                    it1 = groups[g_it][2][seq_temp + 1]
-                    if seq_temp < num_1_half:  # robot in the first half
-                        # orientation points to the small index end
-                        ori_temp = math.atan2(robots[it0].pos[1]-robots[it1].pos[1],
-                                              robots[it0].pos[0]-robots[it1].pos[0])
-                    else:
-                        # orientation points to the large index end
-                        ori_temp = math.atan2(robots[it1].pos[1]-robots[it0].pos[1],
-                                              robots[it1].pos[0]-robots[it0].pos[0])
-                # then calculate the 'explosion' direction
-                if seq_temp < num_1_half:
-                    robots[i].ori = reset_radian(ori_temp + math.pi*(seq_temp+1)/(num_1_half+1))
-                    # always 'explode' to the left side
-                else:
-                    robots[i].ori = reset_radian(ori_temp + math.pi*(num_online-seq_temp)/(num_2_half+1))
-            # pop out this group from 'groups'
-            groups.pop(g_it)
-        # 10.s_back_0, life time of robot '-1' expires, becoming '0'
-        for i in s_back_0:
-            # still maintaining the old moving direction and velocity
-            robots[i].status = 0
-
-        # update the physics(pos, vel and ori), and wall bouncing, life decrese of '-1'
-        for i in range(robot_quantity):
-            # check if out of boundaries, same algorithm from previous line formation program
-            # change only direction of velocity
-            if robots[i].pos[0] >= world_size[0]:  # out of right boundary
-                if math.cos(robots[i].ori) > 0:  # velocity on x is pointing right
-                    robots[i].ori = reset_radian(2*(math.pi/2) - robots[i].ori)
-            elif robots[i].pos[0] <= 0:  # out of left boundary
-                if math.cos(robots[i].ori) < 0:  # velocity on x is pointing left
-                    robots[i].ori = reset_radian(2*(math.pi/2) - robots[i].ori)
-            if robots[i].pos[1] >= world_size[1]:  # out of top boundary
-                if math.sin(robots[i].ori) > 0:  # velocity on y is pointing up
-                    robots[i].ori = reset_radian(2*(0) - robots[i].ori)
-            elif robots[i].pos[1] <= 0:  # out of bottom boundary
-                if math.sin(robots[i].ori) < 0:  # velocity on y is pointing down
-                    robots[i].ori = reset_radian(2*(0) - robots[i].ori)
-            # update one step of distance
-            travel_dist = robots[i].vel * frame_period/1000.0
-            robots[i].pos[0] = robots[i].pos[0] + travel_dist*math.cos(robots[i].ori)
-            robots[i].pos[1] = robots[i].pos[1] + travel_dist*math.sin(robots[i].ori)
-            # update moving direciton and destination of robot '1'
-            if robots[i].status == 1:
-                if robots[i].status_1_sub == 0:  # for the initial forming robots
-                    it0 = robots[i].key_neighbors[0]
-                    vect_temp = (robots[it0].pos[0]-robots[i].pos[0],
-                                 robots[it0].pos[1]-robots[i].pos[1])
-                    ori_temp = math.atan2(vect_temp[1], vect_temp[0])
-                    if dist_table[i][it0] > line_space:
-                        robots[i].ori = ori_temp
+                    robots[i].ori = reset_radian(ori_temp + pi)
+            else:  # for the merging robot
+            # the merging des should be updated, because robots '2' are also moving
+                if (robots[i].key_neighbors[0] == -1 or
+                    robots[i].key_neighbors[1] == -1):
+                    # robot 'i' is merging at starting or end of the line
+                    it0 = 0  # represent the robot at the end
+                    it1 = 0  # represent the robot inward of it0
+                    if robots[i].key_neighbors[0] == -1:
+                        it0 = robots[i].key_neighbors[1]
+                        it1 = robots[it0].key_neighbors[1]
                     else:
-                        robots[i].ori = reset_radian(ori_temp + math.pi)
-                else:  # for the merging robot
-                # the merging des should be updated, because robots '2' are also moving
-                    if (robots[i].key_neighbors[0] == -1 or
-                        robots[i].key_neighbors[1] == -1):
-                        # robot 'i' is merging at starting or end of the line
-                        it0 = 0  # represent the robot at the end
-                        it1 = 0  # represent the robot inward of it0
-                        if robots[i].key_neighbors[0] == -1:
-                            it0 = robots[i].key_neighbors[1]
-                            it1 = robots[it0].key_neighbors[1]
-                        else:
-                            it0 = robots[i].key_neighbors[0]
-                            it1 = robots[it0].key_neighbors[0]
-                        # calculate the new destination and new orientation to the destination
-                        vect_temp = (robots[it0].pos[0]-robots[it1].pos[0],
-                                     robots[it0].pos[1]-robots[it1].pos[1])  # from it1 to it0
-                        ori_temp = math.atan2(vect_temp[1], vect_temp[0])
-                        des_new = [robots[it0].pos[0] + line_space*math.cos(ori_temp),
-                                   robots[it0].pos[1] + line_space*math.sin(ori_temp)]
-                        # update the new destination
-                        robots[i].status_1_1_des = des_new[:]
-                        vect_temp = (des_new[0]-robots[i].pos[0],
-                                     des_new[1]-robots[i].pos[1])  # from robot 'i' to des
-                        # update the new orientation
-                        robots[i].ori = math.atan2(vect_temp[1], vect_temp[0])
-                    else:
-                        # robot 'i' is merging in between
                         it0 = robots[i].key_neighbors[0]
-                        it1 = robots[i].key_neighbors[1]
-                        des_new = [(robots[it0].pos[0]+robots[it1].pos[0])/2,
-                                   (robots[it0].pos[1]+robots[it1].pos[1])/2]
-                        robots[i].status_1_1_des = des_new[:]
-                        vect_temp = (des_new[0]-robots[i].pos[0],
-                                     des_new[1]-robots[i].pos[1])  # from robot 'i' to des
-                        # update the new orientation
-                        robots[i].ori = math.atan2(vect_temp[1], vect_temp[0])
-            # update moving direction, velocity and first merge availability of robot '2'
-            elif robots[i].status == 2:
-                if robots[i].status_2_sequence == 0:
-                    # robot 'i' is at the small index end
-                    it1 = robots[i].key_neighbors[1]  # use it1 because on the large side
-                    # update the first merge availability
-                    if dist_table[i][it1] > merge_min_dist:
-                        robots[i].status_2_avail1[1] = True
-                    else:
-                        robots[i].status_2_avail1[1] = False
-                    # update the moving direction and velocity
-                    # for adjusting on the line, just moving closer or farther to it1
-                    vect_temp = [robots[i].pos[0]-robots[it1].pos[0] ,
-                                 robots[i].pos[1]-robots[it1].pos[1]]  # from it1 to i
-                    ori_temp = math.atan2(vect_temp[1], vect_temp[0])
-                    if dist_table[i][it1] > line_space:
-                        # too far away, move closer to it1
-                        robots[i].ori = reset_radian(ori_temp + math.pi)
-                        robots[i].vel = (dist_table[i][it1] - line_space) * adjust_vel_coef
-                    else:
-                        # too close, move farther away from it1
-                        robots[i].ori = ori_temp
-                        robots[i].vel = (line_space - dist_table[i][it1]) * adjust_vel_coef
-                elif robots[i].status_2_end:
-                    # robot 'i' is at the large index end
-                    it0 = robots[i].key_neighbors[0]
-                    # update the first merge availability
-                    if dist_table[i][it0] > merge_min_dist:
-                        robots[i].status_2_avail1[0] = True
-                    else:
-                        robots[i].status_2_avail1[0] = True
-                    # update the moving direction and velocity
-                    vect_temp = [robots[i].pos[0]-robots[it0].pos[0],
-                                 robots[i].pos[1]-robots[it0].pos[1]]  # from it0 to i
-                    ori_temp = math.atan2(vect_temp[1], vect_temp[0])
-                    if dist_table[i][it0] > line_space:
-                        # too far away, move closer to it0
-                        robots[i].ori = reset_radian(ori_temp + math.pi/2)
-                        robots[i].vel = (dist_table[i][it0] - line_space) * adjust_vel_coef
-                    else:
-                        # too close, move farther away from it0
-                        robots[i].ori = ori_temp
-                        robots[i].vel = (line_space - dist_table[i][it0]) * adjust_vel_coef
+                        it1 = robots[it0].key_neighbors[0]
+                    # calculate the new destination and new orientation to the destination
+                    des_new = line_extension(robots[it0].pos, robots[it1].pos)
+                    # update the new destination
+                    robots[i].status_1_1_des = des_new
+                    vect_x = des_new[0]-robots[i].pos[0]  # from robot 'i' to des
+                    vect_y = des_new[1]-robots[i].pos[1]
+                    # update the new orientation
+                    robots[i].ori = atan2(vect_y, vect_x)
                 else:
-                    # robot 'i' is at no end
+                    # robot 'i' is merging in between
                     it0 = robots[i].key_neighbors[0]
                     it1 = robots[i].key_neighbors[1]
-                    # update the first merge availability
-                    if dist_table[i][it0] > merge_min_dist:
-                        robots[i].status_2_avail1[0] = True
-                    else:
-                        robots[i].status_2_avail1[0] = False
-                    if dist_table[i][it1] > merge_min_dist:
-                        robots[i].status_2_avail1[1] = True
-                    else:
-                        robots[i].status_2_avail1[1] = False
-                    # update the moving direction and velocity
                     des_new = [(robots[it0].pos[0]+robots[it1].pos[0])/2,
                                (robots[it0].pos[1]+robots[it1].pos[1])/2]
-                    vect_temp = (des_new[0]-robots[i].pos[0],
-                                 des_new[1]-robots[i].pos[1])  # from robot 'i' to des
-                    dist_temp = math.sqrt(vect_temp[0]*vect_temp[0] +
-                                          vect_temp[1]*vect_temp[1])
-                    robots[i].ori = math.atan2(vect_temp[1], vect_temp[0])
-                    robots[i].vel = dist_temp * adjust_vel_coef
-            # decrease life time of robot '-1'
-            elif robots[i].status == -1:
-                robots[i].status_n1_life = robots[i].status_n1_life - frame_period/1000.0
-        # life time decrease of the groups
-        for g_it in groups.keys():
-            if groups[g_it][4]: continue  # not decrease life of the dominant
-            groups[g_it][1] = groups[g_it][1] - frame_period/1000.0
+                    robots[i].status_1_1_des = des_new
+                    vect_x = des_new[0]-robots[i].pos[0]  # from robot 'i' to des
+                    vect_y = des_new[1]-robots[i].pos[1]
+                    # update the new orientation
+                    robots[i].ori = atan2(vect_y, vect_x)
+        # update moving direction, velocity and first merge availability of robot '2'
+        elif robots[i].status == 2:
+            if robots[i].status_2_sequence == 0:
+                # robot 'i' is at the small index end
+                it1 = robots[i].key_neighbors[1]  # use it1 because on the large side
+                # update the first merge availability
+                if dist_table[i, it1] > merge_min_dist:
+                    robots[i].status_2_avail1[1] = True
+                else:
+                    robots[i].status_2_avail1[1] = False
+                # update the moving direction and velocity
+                # for adjusting on the line, just moving closer or farther to it1
+                vect_x = robots[i].pos[0]-robots[it1].pos[0]  # from it1 to i
+                vect_y = robots[i].pos[1]-robots[it1].pos[1]
+                ori_temp = atan2(vect_y, vect_x)
+                if dist_table[i, it1] > line_space:
+                    # too far away, move closer to it1
+                    robots[i].ori = reset_radian(ori_temp + pi)
+                    robots[i].vel = (dist_table[i, it1] - line_space) * adjust_vel_coef
+                else:
+                    # too close, move farther away from it1
+                    robots[i].ori = ori_temp
+                    robots[i].vel = (line_space - dist_table[i, it1]) * adjust_vel_coef
+            elif robots[i].status_2_end:
+                # robot 'i' is at the large index end
+                it0 = robots[i].key_neighbors[0]
+                # update the first merge availability
+                if dist_table[i, it0] > merge_min_dist:
+                    robots[i].status_2_avail1[0] = True
+                else:
+                    robots[i].status_2_avail1[0] = True
+                # update the moving direction and velocity
+                vect_x = robots[i].pos[0]-robots[it0].pos[0]  # from it0 to i
+                vect_y = robots[i].pos[1]-robots[it0].pos[1]
+                ori_temp = atan2(vect_y, vect_x)
+                if dist_table[i, it0] > line_space:
+                    # too far away, move closer to it0
+                    robots[i].ori = reset_radian(ori_temp + pi/2)
+                    robots[i].vel = (dist_table[i, it0] - line_space) * adjust_vel_coef
+                else:
+                    # too close, move farther away from it0
+                    robots[i].ori = ori_temp
+                    robots[i].vel = (line_space - dist_table[i, it0]) * adjust_vel_coef
+            else:
+                # robot 'i' is at no end
+                it0 = robots[i].key_neighbors[0]
+                it1 = robots[i].key_neighbors[1]
+                # update the first merge availability
+                if dist_table[i, it0] > merge_min_dist:
+                    robots[i].status_2_avail1[0] = True
+                else:
+                    robots[i].status_2_avail1[0] = False
+                if dist_table[i, it1] > merge_min_dist:
+                    robots[i].status_2_avail1[1] = True
+                else:
+                    robots[i].status_2_avail1[1] = False
+                # update the moving direction and velocity
+                # from robot 'i' to the middle of it0 and it1
+                vect_x = (robots[it0].pos[0]+robots[it1].pos[0])/2 - robots[i].pos[0]
+                vect_y = (robots[it0].pos[1]+robots[it1].pos[1])/2 - robots[i].pos[1]
+                robots[i].ori = atan2(vect_y, vect_x)
+                robots[i].vel = hypot(vect_x, vect_y) * adjust_vel_coef
+        # decrease life time of robot '-1'
+        elif robots[i].status == -1:
+            robots[i].status_n1_life = robots[i].status_n1_life - frame_dt
+    # life time decrease of the groups
+    for group_temp in groups.values():
+        if group_temp[4]: continue  # not decrease life of the dominant
+        group_temp[1] = group_temp[1] - frame_dt
 
-        # graphics update
-        screen.fill(background_color)
-        # draw the robots
-        for i in range(robot_quantity):
-            display_pos = world_to_display(robots[i].pos, world_size, screen_size)
-            # get color of the robot
-            color_temp = ()
-            if robots[i].status == 0:
-                color_temp = robot_0_color
-            elif robots[i].status == 1:
-                color_temp = robot_1_color
-            elif robots[i].status == 2:
-                color_temp = robot_2_color
-            elif robots[i].status == -1:
-                color_temp = robot_n1_color
-            # draw the robot as a small solid circle
-            pygame.draw.circle(screen, color_temp, display_pos, robot_size, 0)  # fill the circle
-        pygame.display.update()
+    # graphics update
+    screen.fill(background_color)
+    # display positions of all robots at once, same conversion as world_to_display()
+    display_poses = np.empty((robot_quantity, 2), dtype=int)  # truncated when assigned
+    display_poses[:,0] = robot_poses[:,0]/world_size[0] * screen_size[0]
+    display_poses[:,1] = (1 - robot_poses[:,1]/world_size[1]) * screen_size[1]
+    # draw the robots
+    for i in range(robot_quantity):
+        # draw the robot as a small solid circle, in the color of its status
+        pygame.draw.circle(screen, robot_colors[robots[i].status], display_poses[i],
+                           robot_size, 0)  # fill the circle
+    pygame.display.update()
 
 pygame.quit()
 
@@ -1,9 +1,13 @@
 # robot class for line formation 2 simulation
 
 class LFRobot:  # LF for line formation
+    # fixed set of attributes, no per-instance __dict__
+    __slots__ = ('pos', 'vel', 'ori', 'status', 'group_id', 'status_1_sub', 'status_1_1_des',
+                 'status_2_sequence', 'status_2_end', 'status_2_avail1', 'status_2_avail2',
+                 'key_neighbors', 'status_n1_life')
     def  __init__(self, pos, vel, ori):
         # pos, velocity, orientation for recording the physics
-        self.pos = list(pos)  # convert to list
+        self.pos = pos  # a row of the simulation's position array, updated in place
         self.vel = vel  # unsigned scalar
         self.ori = ori  # moving direction in the physical coordinates
         # variables for configuring indivudual robot's formation process
@@ -29,8 +33,9 @@ class LFRobot:  # LF for line formation
             # second availability indicates if a robot '1' is allowed to merge
             # first value for the small index side, second for large side
         self.key_neighbors = [-1, -1]  # key neighbors to secure the group formation
-            # one member list for '1_0' robot, the other initial forming neighbor
-            # two member list for '1_1' and '2' robots
+            # always two members, so the list keeps the same shape
+            # for '1_0' robot, first member is the other initial forming neighbor
+            # for '1_1' and '2' robots:
             # first member is the robot on the smaller index side of the line
             # second member is the robot on the larger index side of the line
             # if no neighbor at one side, use -1 as a flag
@@ -0,0 +1,28 @@
+# tests for the angle wrapping in formation_functions
+
+import math
+from formation_functions import reset_radian
+
+# the largest angle below pi is already in range, it should come back as is
+def test_reset_radian_below_pi():
+    radian = math.nextafter(math.pi, 0)
+    result = reset_radian(radian)
+    assert result == radian
+    assert -math.pi <= result < math.pi
+    assert type(result) is float
+
+# pi itself is out of [-pi, pi), it wraps to -pi
+def test_reset_radian_at_pi():
+    assert reset_radian(math.pi) == -math.pi
+
+# -pi is the inclusive lower end of the range
+def test_reset_radian_at_minus_pi():
+    assert reset_radian(-math.pi) == -math.pi
+
+# whole turns away from the range on both sides
+def test_reset_radian_whole_turns():
+    for radian in [-20.0, -7.0, -math.pi - 0.5, 0.0, 1.0, math.pi + 0.5, 7.0, 20.0]:
+        result = reset_radian(radian)
+        assert -math.pi <= result < math.pi
+        assert math.isclose(math.cos(result), math.cos(radian), abs_tol=1e-9)
+        assert math.isclose(math.sin(result), math.sin(radian), abs_tol=1e-9)
@@ -47,23 +47,34 @@ def main():
     # use list to store the node information
     nodes_t = []  # target nodes pool, for decided nodes in target network
     nodes_a = []  # available nodes pool, for nodes available to be added to network
+    # sets of the same nodes as in the two pools, for constant time membership check
+    nodes_t_set = set()
+    nodes_a_set = set()
     # place the first node at the origin for the network
     nodes_t.append((0,0))
+    nodes_t_set.add((0,0))
     for pos in get_neighbors(nodes_t[0]):
         nodes_a.append(pos)  # append all six neighbors to available pool
+        nodes_a_set.add(pos)
 
     # loop for randomly placing new nodes from available pool to generate the network
     for i in range(size-1):  # first node is decided and excluded
         # randomly choose one from the available pool
-        pos_new = random.choice(nodes_a)
-        nodes_a.remove(pos_new)  # remove selected node from available pool
+        index_new = random.randrange(len(nodes_a))
+        pos_new = nodes_a[index_new]
+        # remove selected node from available pool, the last node takes its place
+        nodes_a[index_new] = nodes_a[-1]
+        nodes_a.pop()
+        nodes_a_set.remove(pos_new)
         nodes_t.append(pos_new)  # add new node to the target pool
+        nodes_t_set.add(pos_new)
         # check and update every neighbor of newly selected node
         for pos in get_neighbors(pos_new):
-            if pos in nodes_t: continue
-            if pos in nodes_a: continue
+            if pos in nodes_t_set: continue
+            if pos in nodes_a_set: continue
             # if none of the above, add to the available pool
             nodes_a.append(pos)
+            nodes_a_set.add(pos)
 
     # generate the connection variable, 0 for not connected, 1 for connected
     connections = [[0 for j in range(size)] for i in range(size)]  # populated with zeros
@@ -131,7 +142,7 @@ def main():
     # show the figure, press to exit
     fig.show()
     # choose one of the following two lines
-    raw_input("Press <ENTER> to continue")
+    input("Press <ENTER> to continue")
     plt.close(fig)
 
 
@@ -139,12 +150,15 @@ def main():
 # The first four neighbors are just like the situation in the Cartesian coordinates, the last
 # two neighbors are the two on the diagonal line along the y=-x axis, because the triangle
 # grid is like askewing the y axis toward x, allowing more space in second and fourth quadrants.
+# offsets of the six neighbors, in the order described above
+neighbor_offsets = ((1, 0), (-1, 0),
+                    (0, 1), (0, -1),
+                    (1, -1), (-1, 1))
 def get_neighbors(pos):
     x = pos[0]
     y = pos[1]
-    return [(x+1, y), (x-1, y),
-            (x, y+1), (x, y-1),
-            (x+1, y-1), (x-1, y+1)]
+    for dx, dy in neighbor_offsets:
+        yield (x+dx, y+dy)
 
 # return Cartesian coordinates of triangle grid nodes for plotting
 def trigrid_to_cartesian(pos):
@@ -31,6 +31,7 @@ from trigridnet_generator import *
 from formation_functions import *
 import numpy as np
 import os, getopt, sys, time, random
+from collections import deque
 
 import pandas as pd
 pd.set_option('display.max_columns', None)
@@ -71,19 +72,19 @@ while len(new_line) != 0:
     nodes_tri.append(pos)
     new_line = f.readline()
 
-# generate the connection matrix, 0 for not connected, 1 for connected
-connections = np.zeros((net_size, net_size))
+# generate the connection matrix, False for not connected, True for connected
+connections = np.zeros((net_size, net_size), dtype=bool)
 for i in range(net_size):
     for j in range(i+1, net_size):
         diff_x = nodes_tri[i][0] - nodes_tri[j][0]
         diff_y = nodes_tri[i][1] - nodes_tri[j][1]
         if abs(diff_x) + abs(diff_y) == 1 or diff_x * diff_y == -1:
-            connections[i,j] = 1
-            connections[j,i] = 1
+            connections[i,j] = True
+            connections[j,i] = True
 # connection list indexed by node
 connection_lists = []
 for i in range(net_size):
-    connection_lists.append(list(np.where(connections[i] == 1)[0]))
+    connection_lists.append(np.flatnonzero(connections[i]).tolist())
 
 # plot the network as dots and lines in pygame window
 pygame.init()
@@ -121,16 +122,19 @@ nodes_disp = [world_to_display(nodes_cart[i], world_size, screen_size)
               for i in range(net_size)]
 
 # draw the network for the first time
+# list the connections once, each as a pair of display positions
+edges_disp = [(nodes_disp[i], nodes_disp[j])
+              for i, j in zip(*np.nonzero(np.triu(connections, 1)))]
 screen.fill(color_white)
-for i in range(net_size):
-    for j in range(i+1, net_size):
-        if connections[i,j]:
-            pygame.draw.line(screen, color_black, nodes_disp[i], nodes_disp[j], line_width)
+for edge in edges_disp:
+    pygame.draw.line(screen, color_black, edge[0], edge[1], line_width)
 for i in range(net_size):
     pygame.draw.circle(screen, color_black, nodes_disp[i], node_size, 0)
     # text = font.render(str(i), True, color_black)
     # screen.blit(text, (nodes_disp[i][0]+12, nodes_disp[i][1]-12))
 pygame.display.update()
+# keep the static network as background, to be restored for every display update
+background = screen.copy()
 
 input("press <ENTER> to continue")
 
@@ -157,83 +161,108 @@ input("press <ENTER> to continue")
 # However, to simplify the role assignment simulation, the gradient map is pre-calculated.
 # Although I could use algorithm similar in the holistic dependency calculation, a new one that
 # searching the shortest path between any two nodes is investigated in the following.
-gradients = np.copy(connections)  # build gradient map on the connection map
+# Breadth first search from every node as message source, each node in the network is
+# reached only once in each search, with the shortest path length as its gradient value.
+gradients = np.zeros((net_size, net_size), dtype=np.int32)
     # gradients[i,j] indicates gradient value of node j, to message source i
-pool_gradient = 1  # gradients of the connections in the pool
-pool_conn = {}
-for i in range(net_size):
-    pool_conn[i] = connection_lists[i][:]  # start with gradient 1 connections
-while len(pool_conn.keys()) != 0:
-    source_deactivate = []
-    for source in pool_conn:
-        targets_temp = []  # the new targets
-        for target in pool_conn[source]:
-            for target_new in connection_lists[target]:
-                if target_new == source: continue  # skip itself
-                if gradients[source, target_new] == 0:
-                    gradients[source, target_new] = pool_gradient + 1
-                    targets_temp.append(target_new)
-        if len(targets_temp) == 0:
-            source_deactivate.append(source)
-        else:
-            pool_conn[source] = targets_temp[:]  # update with new targets
-    for source in source_deactivate:
-        pool_conn.pop(source)  # remove the finished sources
-    pool_gradient = pool_gradient + 1
+for source in range(net_size):
+    gradient_temp = gradients[source]  # row of this message source, updated in place
+    visited = [False for i in range(net_size)]
+    visited[source] = True  # source has gradient value of 0
+    search_queue = deque([source])
+    while len(search_queue) != 0:
+        target = search_queue.popleft()
+        for target_new in connection_lists[target]:
+            if visited[target_new]: continue
+            visited[target_new] = True
+            gradient_temp[target_new] = gradient_temp[target] + 1
+            search_queue.append(target_new)
 
 # calculate the relative gradient values
-gradients_rel = []
-    # gradients_rel[i][j,k] refers to gradient of k relative to j with message source i
-for i in range(net_size):  # message source i
-    gradient_temp = np.zeros((net_size, net_size))
-    for j in range(net_size):  # in the view point of j
-        gradient_temp[j] = gradients[i] - gradients[i,j]
-    gradients_rel.append(gradient_temp)
+# gradient values are path lengths in the network, small enough for 16-bit integers
+gradients_rel = (gradients[:,np.newaxis,:].astype(np.int16) -
+                 gradients[:,:,np.newaxis].astype(np.int16))
+    # gradients_rel[i,j,k] refers to gradient of k relative to j with message source i
 
 # list the neighbors a node can send message to regarding a message source
-neighbors_send = [[[] for j in range(net_size)] for i in range(net_size)]
-    # neighbors_send[i][j][k] means, if message from source i is received in j,
-    # it should be send to k
-for i in range(net_size):  # message source i
-    for j in range(net_size):  # in the view point of j
-        for neighbor in connection_lists[j]:
-            if gradients_rel[i][j,neighbor] == 1:
-                neighbors_send[i][j].append(neighbor)
+# send to the neighbors one gradient value further from the message source
+send_mask = (gradients_rel == 1) & connections[np.newaxis,:,:]
+# all the lists are packed in one flat array, with start positions for each list
+neighbors_send = np.nonzero(send_mask.reshape(net_size*net_size, net_size))[1]
+neighbors_send_start = np.zeros(net_size*net_size + 1, dtype=np.int64)
+np.cumsum(np.count_nonzero(send_mask, axis=2).ravel(), out=neighbors_send_start[1:])
+    # with k = i*net_size+j, neighbors_send[neighbors_send_start[k]:neighbors_send_start[k+1]]
+    # means, if message from source i is received in j, it should be send to these nodes
 
 # generate the initial preference distribution
 pref_dist = np.random.rand(net_size, net_size)  # no need to normalize it
 initial_roles = np.argmax(pref_dist, axis=1)  # the chosen role
 
 # the local assignment information
-local_role_assignment = [[[-1, 0, -1] for j in range(net_size)] for i in range(net_size)]
-    # local_role_assignment[i][j] is local assignment information of node i for node j
-    # first number is chosen role, second is probability, third is time stamp
-local_node_assignment = [[[] for j in range(net_size)] for i in range(net_size)]
-    # local_node_assignment[i][j] is local assignment of node i for role j
-    # contains a list of nodes that choose role j
+# [i,j] of each matrix is local assignment information of node i for node j
+local_roles = np.full((net_size, net_size), -1, dtype=np.int32)  # chosen role
+local_probs = np.zeros((net_size, net_size))  # probability of chosen role
+local_stamps = np.full((net_size, net_size), -1, dtype=np.int32)  # time stamp
+local_node_count = np.zeros((net_size, net_size), dtype=np.int32)
+    # local_node_count[i,j] is local assignment of node i for role j
+    # number of nodes that choose role j, which nodes they are is not needed
 # populate the chosen role of itself to the local assignment information
 for i in range(net_size):
-    local_role_assignment[i][i][0] = initial_roles[i]
-    local_role_assignment[i][i][1] = pref_dist[i, initial_roles[i]]
-    local_role_assignment[i][i][2] = 0
-    local_node_assignment[i][initial_roles[i]].append(i)
-
-# received message container for all nodes
-message_rx = [[] for i in range(net_size)]
+    local_roles[i,i] = initial_roles[i]
+    local_probs[i,i] = pref_dist[i, initial_roles[i]]
+    local_stamps[i,i] = 0
+    local_node_count[i, initial_roles[i]] = 1
+
+# received message container for all nodes, preallocated and reused in every iteration
+# one node receives at most one message of each source from each of its neighbors
+message_max = max([len(neighbors) for neighbors in connection_lists]) * net_size
+message_type = np.dtype([('source', np.int32), ('role', np.int32),
+                         ('probability', np.float64), ('time_stamp', np.int32)])
+message_rx = np.zeros((net_size, message_max), dtype=message_type)
+message_rx_count = np.zeros(net_size, dtype=np.int32)  # number of messages in each row
+# a second container of the same size, swapped with the receiver for processing
+message_rx_buf = np.zeros((net_size, message_max), dtype=message_type)
+message_rx_buf_count = np.zeros(net_size, dtype=np.int32)
 # for each message entry, it containts:
     # message[0]: ID of message source
     # message[1]: its preferred role
     # message[2]: probability of chosen role
     # message[3]: time stamp
+
+# send the local assignment information of the sources from the transmitters, to the
+# neighbors in neighbors_send, all messages are written to the receiver rx at once
+# return the number of messages sent
+def transmit_messages(transmitters, sources, rx, rx_count):
+    # expand the pairs to one entry per message, with the target from neighbors_send
+    send_start = neighbors_send_start[sources*net_size + transmitters]
+    send_count = neighbors_send_start[sources*net_size + transmitters + 1] - send_start
+    message_quantity = np.sum(send_count)
+    pair_index = np.repeat(np.arange(len(sources)), send_count)
+    targets = neighbors_send[np.arange(message_quantity) -
+                             np.repeat(np.cumsum(send_count) - send_count - send_start,
+                                       send_count)]
+    # messages to the same target are queued in the sending order
+    order = np.argsort(targets, kind='stable')
+    targets = targets[order]
+    pair_index = pair_index[order]
+    queue_pos = (rx_count[targets] + np.arange(message_quantity) -
+                 np.searchsorted(targets, targets))
+    # write all the messages at once
+    transmitters = transmitters[pair_index]
+    sources = sources[pair_index]
+    rx['source'][targets, queue_pos] = sources
+    rx['role'][targets, queue_pos] = local_roles[transmitters, sources]
+    rx['probability'][targets, queue_pos] = local_probs[transmitters, sources]
+    rx['time_stamp'][targets, queue_pos] = local_stamps[transmitters, sources]
+    rx_count += np.bincount(targets, minlength=net_size)
+    return message_quantity
+
 # all nodes transmit once their chosen role before the loop
-transmission_total = 0  # count message transmissions for each iteration
+# a node sends its own message to all neighbors, which are the ones in neighbors_send
 iter_count = 0  # also used as time stamp in message
-for source in range(net_size):
-    chosen_role = local_role_assignment[source][source][0]
-    message_temp = [source, chosen_role, pref_dist[source, chosen_role], iter_count]
-    for target in connection_lists[source]:  # send to all neighbors
-        message_rx[target].append(message_temp)
-        transmission_total = transmission_total + 1
+transmission_total = transmit_messages(np.arange(net_size), np.arange(net_size),
+                                       message_rx, message_rx_count)
+    # count message transmissions for each iteration
 role_color = [0 for i in range(net_size)]  # colors for a conflicting role
 # Dynamically manage color for conflicting nodes is unnecessarily complicated, might as
 # well assign the colors in advance.
@@ -250,20 +279,26 @@ while len(role_index_pool) != 0:
         random.shuffle(color_index_pool)
 
 # flags
-transmit_flag = [[False for j in range(net_size)] for i in range(net_size)]
+transmit_flag = np.zeros((net_size, net_size), dtype=bool)
     # whether node i should transmit received message of node j
-change_flag = [False for i in range(net_size)]
+change_flag = np.zeros(net_size, dtype=bool)
     # whether node i should change its chosen role
-scheme_converged = [False for i in range(net_size)]
+scheme_converged = np.zeros(net_size, dtype=bool)
 
 sim_exit = False
 sim_pause = False
-time_now = pygame.time.get_ticks()
-time_last = time_now
+sim_clock = pygame.time.Clock()  # sleeps out the rest of each event frame
 time_period = 2000
+event_period = 50  # short frame for handling the events, in ms
 speed_control = True  # set False to skip speed control
+time_last = pygame.time.get_ticks() - time_period  # first iteration runs at once
 flash_delay = 200
+display_state_last = None  # what is on the display, to skip the unchanged updates
 while not sim_exit:
+    # short frames for handling the events, also while paused
+    if speed_control or sim_pause:
+        sim_clock.tick(1000.0/event_period)
+
     # exit the program by close window button, or Esc or Q on keyboard
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
@@ -277,23 +312,23 @@ while not sim_exit:
     # skip the rest if paused
     if sim_pause: continue
 
-    # simulation speed control
-    time_now = pygame.time.get_ticks()
-    if (time_now - time_last) > time_period:
+    # simulation speed control, run one iteration once the period has passed
+    if speed_control:
+        time_now = pygame.time.get_ticks()
+        if time_now - time_last < time_period: continue
         time_last = time_now
-    else:
-        continue
 
     iter_count = iter_count + 1
 
     # process the received messages
-    # transfer messages to the processing buffer, then empty the message receiver
-    message_rx_buf = [[[k for k in j] for j in i] for i in message_rx]
-    message_rx = [[] for i in range(net_size)]
+    # swap the messages to the processing buffer, then empty the message receiver
+    message_rx, message_rx_buf = message_rx_buf, message_rx
+    message_rx_count, message_rx_buf_count = message_rx_buf_count, message_rx_count
+    message_rx_count.fill(0)
     yield_nodes = []  # the nodes that are yielding on chosen roles
     yield_roles = []  # the old roles of yield_nodes before yielding
     for i in range(net_size):  # messages received by node i
-        for message in message_rx_buf[i]:
+        for message in message_rx_buf[i, :message_rx_buf_count[i]].tolist():
             source = message[0]
             role = message[1]
             probability = message[2]
@@ -301,121 +336,103 @@ while not sim_exit:
             if source == i:
                 print("error, node {} receives message of itself".format(i))
                 sys.exit()
-            if time_stamp > local_role_assignment[i][source][2]:
+            if time_stamp > local_stamps[i, source]:
                 # received message will only take any effect if time stamp is new
-                # update local_node_assignment
-                role_old = local_role_assignment[i][source][0]
+                # update local_node_count
+                role_old = local_roles[i, source]
                 if role_old >= 0:  # has been initialized before, not -1
-                    local_node_assignment[i][role_old].remove(source)
-                local_node_assignment[i][role].append(source)
-                # update local_role_assignment
-                local_role_assignment[i][source][0] = role
-                local_role_assignment[i][source][1] = probability
-                local_role_assignment[i][source][2] = time_stamp
-                transmit_flag[i][source] = True
+                    local_node_count[i, role_old] = local_node_count[i, role_old] - 1
+                local_node_count[i, role] = local_node_count[i, role] + 1
+                # update local assignment information
+                local_roles[i, source] = role
+                local_probs[i, source] = probability
+                local_stamps[i, source] = time_stamp
+                transmit_flag[i, source] = True
                 # check conflict with itself
-                if role == local_role_assignment[i][i][0]:
-                    if probability >= pref_dist[i, local_role_assignment[i][i][0]]:
+                if role == local_roles[i, i]:
+                    if probability >= pref_dist[i, local_roles[i, i]]:
                         # change its choice after all message received
                         change_flag[i] = True
                         yield_nodes.append(i)
-                        yield_roles.append(local_role_assignment[i][i][0])
+                        yield_roles.append(local_roles[i, i])
     # change the choice of role for those decide to
-    for i in range(net_size):
-        if change_flag[i]:
-            change_flag[i] = False
-            role_old = local_role_assignment[i][i][0]
-            pref_dist_temp = np.copy(pref_dist[i])
-            pref_dist_temp[local_role_assignment[i][i][0]] = -1
-                # set to negative to avoid being chosen
-            for j in range(net_size):
-                if len(local_node_assignment[i][j]) != 0:
-                    # eliminate those choices that have been taken
-                    pref_dist_temp[j] = -1
-            role_new = np.argmax(pref_dist_temp)
-            if pref_dist_temp[role_new] < 0:
-                print("error, node {} has no available role".format(i))
-                sys.exit()
-            # role_new is good to go
-            # update local_node_assignment
-            local_node_assignment[i][role_old].remove(i)
-            local_node_assignment[i][role_new].append(i)
-            # update local_role_assignment
-            local_role_assignment[i][i][0] = role_new
-            local_role_assignment[i][i][1] = pref_dist[i][role_new]
-            local_role_assignment[i][i][2] = iter_count
-            transmit_flag[i][i] = True
+    # each node only works on its own local information, so all are decided at once
+    change_nodes = np.flatnonzero(change_flag)
+    change_flag[change_nodes] = False
+    roles_old = local_roles[change_nodes, change_nodes]
+    pref_dist_temp = pref_dist[change_nodes]  # a copy of the rows of those nodes
+    # set to negative to avoid being chosen, the old role is also taken by itself
+    pref_dist_temp[local_node_count[change_nodes] != 0] = -1
+        # eliminate those choices that have been taken
+    roles_new = np.argmax(pref_dist_temp, axis=1)
+    no_role = pref_dist_temp[np.arange(len(change_nodes)), roles_new] < 0
+    if np.any(no_role):
+        print("error, node {} has no available role".format(change_nodes[no_role][0]))
+        sys.exit()
+    # roles_new are good to go
+    transmit_flag[change_nodes, change_nodes] = True
+    # update local_node_count
+    local_node_count[change_nodes, roles_old] = local_node_count[change_nodes, roles_old] - 1
+    local_node_count[change_nodes, roles_new] = local_node_count[change_nodes, roles_new] + 1
+    # update local assignment information
+    local_roles[change_nodes, change_nodes] = roles_new
+    local_probs[change_nodes, change_nodes] = pref_dist[change_nodes, roles_new]
+    local_stamps[change_nodes, change_nodes] = iter_count
     # transmit the received messages or initial new message transmission
-    transmission_total = 0
-    for transmitter in range(net_size):  # transmitter node
-        for source in range(net_size):  # message is for this source node
-            if transmit_flag[transmitter][source]:
-                transmit_flag[transmitter][source] = False
-                message_temp = [source, local_role_assignment[transmitter][source][0],
-                                        local_role_assignment[transmitter][source][1],
-                                        local_role_assignment[transmitter][source][2]]
-                for target in neighbors_send[source][transmitter]:
-                    message_rx[target].append(message_temp)
-                    transmission_total = transmission_total + 1
+    # only the flagged pairs, in order of transmitter node then source node
+    transmitters, sources = np.nonzero(transmit_flag)
+    transmit_flag.fill(False)
+    transmission_total = transmit_messages(transmitters, sources,
+                                           message_rx, message_rx_count)
 
     # check if role assignment scheme is converged at individual node
-    for i in range(net_size):
-        if not scheme_converged[i]:
-            converged = True
-            for j in range(net_size):
-                if len(local_node_assignment[i][j]) != 1:
-                    converged  = False
-                    break
-            if converged:
-                scheme_converged[i] = True
+    # every role is chosen by exactly one node, once converged it stays converged
+    scheme_converged = scheme_converged | np.all(local_node_count == 1, axis=1)
 
     # for display, scan the nodes that have detected conflict but not yielding
     persist_nodes = []
     for i in range(net_size):
         if i in yield_nodes: continue
-        if len(local_node_assignment[i][local_role_assignment[i][i][0]]) > 1:
+        if local_node_count[i, local_roles[i, i]] > 1:
             persist_nodes.append(i)
 
     # debug print
     print("iteration {}, total transmission {}".format(iter_count, transmission_total))
 
-    # update the display
-    for i in range(net_size):
-        for j in range(i+1, net_size):
-            if connections[i,j]:
-                pygame.draw.line(screen, color_black, nodes_disp[i], nodes_disp[j], line_width)
-    for i in range(net_size):
-        pygame.draw.circle(screen, color_black, nodes_disp[i], node_size, 0)
-    # draw the persisting nodes with color of conflicting role
-    for i in persist_nodes:
-        pygame.draw.circle(screen, distinct_color_set[role_color[local_role_assignment[i][i][0]]],
-            nodes_disp[i], node_size, 0)
-    # draw extra ring on node if local scheme has converged
-    for i in range(net_size):
-        if scheme_converged[i]:
+    # update the display, only if the persisting nodes or converged nodes have changed
+    persist_colors = [role_color[local_roles[i, i]] for i in persist_nodes]
+    converged_nodes = np.flatnonzero(scheme_converged).tolist()
+    display_state = (persist_nodes, persist_colors, converged_nodes)
+    if display_state != display_state_last:
+        display_state_last = display_state
+        # start from the plain network
+        screen.blit(background, (0,0))
+        # draw the persisting nodes with color of conflicting role
+        for i, color_index in zip(persist_nodes, persist_colors):
+            pygame.draw.circle(screen, distinct_color_set[color_index],
+                nodes_disp[i], node_size, 0)
+        # draw extra ring on node if local scheme has converged
+        for i in converged_nodes:
             pygame.draw.circle(screen, color_black, nodes_disp[i], converge_ring_size, 2)
-    pygame.display.update()
-    # flash the yielding nodes with color of old role
-    for _ in range(3):
-        # change to color
-        for i in range(len(yield_nodes)):
-            pygame.draw.circle(screen, distinct_color_set[role_color[yield_roles[i]]],
-                nodes_disp[yield_nodes[i]], node_size, 0)
-        pygame.display.update()
-        pygame.time.delay(flash_delay)
-        # change to black
-        for i in range(len(yield_nodes)):
-            pygame.draw.circle(screen, color_black,
-                nodes_disp[yield_nodes[i]], node_size, 0)
         pygame.display.update()
-        pygame.time.delay(flash_delay)
+    # flash the yielding nodes with color of old role, they end up in black as before
+    if len(yield_nodes) != 0:
+        for _ in range(3):
+            # change to color
+            for i in range(len(yield_nodes)):
+                pygame.draw.circle(screen, distinct_color_set[role_color[yield_roles[i]]],
+                    nodes_disp[yield_nodes[i]], node_size, 0)
+            pygame.display.update()
+            pygame.time.delay(flash_delay)
+            # change to black
+            for i in range(len(yield_nodes)):
+                pygame.draw.circle(screen, color_black,
+                    nodes_disp[yield_nodes[i]], node_size, 0)
+            pygame.display.update()
+            pygame.time.delay(flash_delay)
 
     # exit the simulation if all role assignment schemes have converged
-    all_converged = scheme_converged[0]
-    for i in range(1, net_size):
-        all_converged = all_converged and scheme_converged[i]
-        if not all_converged: break
-    if all_converged: sim_exit = True
+    if np.all(scheme_converged): sim_exit = True
 
 # hold the simulation window to exit manually
 input("role assignment finished, press <ENTER> to exit")